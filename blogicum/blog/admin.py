@@ -1,6 +1,31 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
 
-from .models import Post, Category, Location, Comment
+from . import dumps
+from .models import Post, Category, Location, Comment, Follow
+
+
+def streaming_export(queryset, lines, file_format, content_type):
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = (
+        'attachment; '
+        f'filename="{queryset.model._meta.model_name}.{file_format}"')
+    return response
+
+
+@admin.action(description='Выгрузить в JSON Lines', permissions=['view'])
+def export_jsonl(modeladmin, request, queryset):
+    return streaming_export(
+        queryset, dumps.jsonl_lines(dumps.iter_records(queryset)), 'jsonl',
+        'application/x-ndjson; charset=utf-8')
+
+
+@admin.action(description='Выгрузить в CSV', permissions=['view'])
+def export_csv(modeladmin, request, queryset):
+    return streaming_export(
+        queryset, dumps.csv_lines(
+            queryset.model, dumps.iter_records(queryset)),
+        'csv', 'text/csv; charset=utf-8')
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -17,6 +42,7 @@ class PostAdmin(admin.ModelAdmin):
                      'location',
                      'category')
 
+    # На PostgreSQL поиск идёт по триграммному индексу (миграция 0012).
     search_fields = ('title',)
     list_filter = ('category', 'location')
     list_display_links = ('title', )
@@ -52,5 +78,9 @@ admin.site.register(Post, PostAdmin)
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Location, LocationAdmin)
 admin.site.register(Comment)
+admin.site.register(Follow)
+
+admin.site.add_action(export_jsonl)
+admin.site.add_action(export_csv)
 
 admin.site.empty_value_display = 'Не задано'
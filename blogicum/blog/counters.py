@@ -0,0 +1,143 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import connections
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+KEY_PREFIX = 'blog:count'
+
+
+def count_key(category_id=None, author_id=None, add_filter=True):
+    """Ключ кэша для количества постов в ленте с заданным фильтром"""
+    if author_id is not None:
+        kind = 'author' if add_filter else 'author-all'
+        return f'{KEY_PREFIX}:{kind}:{author_id}'
+    if category_id is not None:
+        return f'{KEY_PREFIX}:category:{category_id}'
+    return f'{KEY_PREFIX}:all'
+
+
+def visible_keys(author_id, category_id):
+    """Ключи лент, в которые попадает видимый пост"""
+    return [
+        count_key(),
+        count_key(category_id=category_id),
+        count_key(author_id=author_id),
+    ]
+
+
+def estimate_count(queryset):
+    """
+    Быстрая оценка количества строк кверисета.
+
+    На PostgreSQL берётся оценка планировщика, на остальных бэкендах
+    плотность подходящих записей измеряется на первых
+    POST_COUNT_ESTIMATE_THRESHOLD строках по первичному ключу
+    и экстраполируется на весь диапазон ключей таблицы.
+    """
+    queryset = queryset.order_by()
+    threshold = settings.POST_COUNT_ESTIMATE_THRESHOLD
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    pks = list(queryset.order_by('pk').values_list(
+        'pk', flat=True)[:threshold])
+    if len(pks) < threshold:
+        return len(pks)
+    last_pk = queryset.model.objects.aggregate(Max('pk'))['pk__max']
+    return round(threshold * (last_pk - pks[0] + 1) / (pks[-1] - pks[0] + 1))
+
+
+def next_refresh(queryset):
+    """Время, когда в ленте появится ближайший отложенный пост"""
+    return queryset.filter(pub_date__gt=timezone.now()).aggregate(
+        Min('pub_date'))['pub_date__min']
+
+
+def get_count(key, queryset, scheduled=None):
+    """
+    Количество постов в ленте из кэша.
+
+    При промахе количество считается заново, а в кэш рядом с ним
+    кладётся время публикации ближайшего отложенного поста
+    из scheduled: после него счётчик пересчитывается.
+    """
+    cached = cache.get_many([key, f'{key}:refresh'])
+    refresh_at = cached.get(f'{key}:refresh')
+    if key in cached and (refresh_at is None or refresh_at > timezone.now()):
+        return cached[key]
+
+    if settings.POST_COUNT_ESTIMATE:
+        count = estimate_count(queryset)
+    else:
+        count = queryset.count()
+    timeout = settings.POST_COUNT_CACHE_TIMEOUT
+    cache.set(key, count, timeout)
+    if scheduled is not None:
+        cache.set(f'{key}:refresh', next_refresh(scheduled), timeout)
+    return count
+
+
+def adjust(keys, delta):
+    """Инкрементальное изменение закэшированных счётчиков"""
+    for key in keys:
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # Счётчик ещё не посчитан или вытеснен: его посчитают при чтении.
+            pass
+
+
+def schedule_refresh(keys, pub_date):
+    """Пересчитать счётчики, когда отложенный пост станет видимым"""
+    refresh_keys = [f'{key}:refresh' for key in keys]
+    refreshes = cache.get_many(refresh_keys)
+    cache.set_many({
+        refresh_key: pub_date for refresh_key in refresh_keys
+        if refreshes.get(refresh_key) is None
+        or refreshes[refresh_key] > pub_date
+    }, settings.POST_COUNT_CACHE_TIMEOUT)
+
+
+def invalidate(keys):
+    """Сброс счётчиков, которые нельзя обновить инкрементально"""
+    cache.delete_many(
+        list(keys) + [f'{key}:refresh' for key in keys])
+
+
+class ElidedPage(Page):
+
+    @property
+    def elided_page_range(self):
+        """Номера страниц рядом с текущей и по краям, с пропусками"""
+        return self.paginator.get_elided_page_range(self.number)
+
+
+class CountedPaginator(Paginator):
+    """
+    Пагинатор, берущий количество объектов из кэша счётчиков.
+    Страницы отдают сокращённый список номеров для навигации.
+    """
+
+    def __init__(self, *args, count_key=None, count_scheduled=None,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_key = count_key
+        self.count_scheduled = count_scheduled
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        return get_count(
+            self.count_key, self.object_list, self.count_scheduled)
+
+    def _get_page(self, *args, **kwargs):
+        return ElidedPage(*args, **kwargs)
@@ -0,0 +1,118 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, F
+from django.utils import timezone
+
+from . import timeline
+from .models import FeedEntry, Post
+
+REBUILD_BATCH_SIZE = 2000
+VERSION_KEY = 'blog:feed:version'
+
+
+def get_version():
+    """Версия содержимого лент: входит в ключи их кэша"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """Делает устаревшими все закэшированные страницы и фрагменты лент"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Версия начинается со времени, чтобы не совпасть с вытесненной.
+        cache.add(VERSION_KEY, time.time_ns(), None)
+
+
+def listed_posts():
+    """Посты, которые должны быть в ленте, включая отложенные"""
+    return Post.objects.select_related(
+        'category', 'location', 'author').filter(
+            is_published=True, category__is_published=True)
+
+
+def visible_entries(**filters):
+    """Видимые записи ленты: один проход по индексу в порядке pub_date"""
+    return FeedEntry.objects.filter(pub_date__lte=timezone.now(), **filters)
+
+
+def sync_post(post):
+    """Создаёт, обновляет или удаляет запись ленты для поста"""
+    if not (post.is_published and post.category_id
+            and post.category.is_published):
+        FeedEntry.objects.filter(post_id=post.pk).delete()
+    else:
+        fields = FeedEntry.card_fields(post)
+        if FeedEntry.objects.filter(post_id=post.pk).update(**fields):
+            timeline.move_entry(FeedEntry(post_id=post.pk, **fields))
+        else:
+            entry = FeedEntry.objects.create(
+                post_id=post.pk, comment_count=post.comments.count(),
+                **fields)
+            timeline.fan_out(entry)
+    bump_version()
+
+
+def sync_category(category):
+    """Обновляет записи ленты после изменения категории"""
+    if not category.is_published:
+        FeedEntry.objects.filter(category=category).delete()
+    else:
+        FeedEntry.objects.filter(category=category).update(
+            category_title=category.title, category_slug=category.slug)
+        missing = listed_posts().filter(category=category, feed_entry=None)
+        rebuild(missing, clear=False)
+    bump_version()
+
+
+def sync_location(location, deleted=False):
+    """Обновляет название места в записях ленты"""
+    name = location.name if location.is_published and not deleted else ''
+    FeedEntry.objects.filter(post__location=location).update(
+        location_name=name)
+    bump_version()
+
+
+def sync_author(user):
+    if FeedEntry.objects.filter(author=user).exclude(
+            author_username=user.username).update(
+                author_username=user.username):
+        bump_version()
+
+
+def change_comment_count(post_id, delta):
+    FeedEntry.objects.filter(post_id=post_id).update(
+        comment_count=F('comment_count') + delta)
+    bump_version()
+
+
+def rebuild(posts=None, clear=True):
+    """
+    Полная пересборка ленты пачками по REBUILD_BATCH_SIZE постов.
+
+    На PostgreSQL посты читаются через серверный курсор.
+    """
+    if posts is None:
+        posts = listed_posts()
+    if clear:
+        FeedEntry.objects.all().delete()
+    posts = posts.annotate(comment_count=Count('comments')).order_by('pk')
+    created = 0
+    batch = []
+    for post in posts.iterator(chunk_size=REBUILD_BATCH_SIZE):
+        batch.append(FeedEntry(
+            post_id=post.pk, comment_count=post.comment_count,
+            **FeedEntry.card_fields(post)))
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            created += len(FeedEntry.objects.bulk_create(batch))
+            timeline.fan_out_many(batch)
+            batch = []
+    created += len(FeedEntry.objects.bulk_create(batch))
+    timeline.fan_out_many(batch)
+    bump_version()
+    return created
@@ -0,0 +1,76 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from blog import feed
+from blog.models import Comment, Post
+from core.benchmark import summarize
+
+BENCH_USERNAME = 'bench-concurrency'
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест базы: параллельная запись комментариев '
+            'и чтение ленты. Созданные комментарии удаляются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=10)
+
+    def handle(self, *args, **options):
+        self.post = Post.objects.order_by('-pk').first()
+        if self.post is None:
+            raise CommandError('Нужен хотя бы один пост, см. seed_blog.')
+        self.user, _ = get_user_model().objects.get_or_create(
+            username=BENCH_USERNAME)
+        self.results = {'write': ([], [0]), 'read': ([], [0])}
+        self.stop_at = time.monotonic() + options['duration']
+
+        threads = (
+            [threading.Thread(target=self.worker, args=('write', self.write))
+             for _ in range(options['writers'])]
+            + [threading.Thread(target=self.worker, args=('read', self.read))
+               for _ in range(options['readers'])])
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        Comment.objects.filter(author=self.user).delete()
+        self.user.delete()
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.stdout.write(f'journal_mode: {cursor.fetchone()[0]}')
+        for kind, (latencies, errors) in self.results.items():
+            stats = summarize(latencies, options['duration'], errors[0])
+            self.stdout.write(
+                f'{kind:>5}: {stats["rps"]} op/s, p50 {stats["p50_ms"]} ms, '
+                f'p99 {stats["p99_ms"]} ms, ошибок {stats["errors"]}')
+
+    def write(self):
+        with transaction.atomic():
+            Comment.objects.create(
+                post=self.post, author=self.user, text='benchmark')
+
+    def read(self):
+        list(feed.visible_entries()[:10])
+        feed.visible_entries().count()
+
+    def worker(self, kind, operation):
+        latencies, errors = self.results[kind]
+        try:
+            while time.monotonic() < self.stop_at:
+                started = time.monotonic()
+                try:
+                    operation()
+                except OperationalError:
+                    errors[0] += 1
+                    continue
+                latencies.append(time.monotonic() - started)
+        finally:
+            connection.close()
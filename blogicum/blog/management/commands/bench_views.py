@@ -0,0 +1,200 @@
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import seed, urls as blog_urls
+from blog.models import Comment, Post
+from core.benchmark import compare, summarize
+from core.queries import record_queries
+from pages import urls as pages_urls
+
+BENCH_USERNAME = 'bench-views'
+SCALES = {'1k': 1_000, '100k': 100_000, '1M': 1_000_000}
+BASELINE_DIR = Path(settings.BASE_DIR).parent / 'benchmarks'
+
+
+class Command(BaseCommand):
+    help = ('Бенчмарк всех маршрутов blog и pages: пропускная способность, '
+            'p50/p99, запросы к базе и пик памяти, сравнение с базовой '
+            'линией. Запускайте на отдельной базе (SQLITE_PATH).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='1k')
+        parser.add_argument(
+            '--seed', action='store_true',
+            help='Дополнить базу до нужного количества постов')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Запросов на маршрут до начала измерений')
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом')
+        parser.add_argument(
+            '--baseline',
+            help='Файл базовой линии, по умолчанию '
+                 'benchmarks/baseline-<scale>.json')
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать результаты как базовую линию')
+        parser.add_argument('--tolerance', type=float, default=0.25)
+
+    def handle(self, *args, **options):
+        scale = options['scale']
+        missing = SCALES[scale] - Post.objects.count()
+        if options['seed'] and missing > 0:
+            self.stdout.write(f'Создание {missing} постов...')
+            seed.seed(missing)
+        if not Post.objects.exists():
+            raise CommandError('База пуста, запустите с --seed.')
+
+        self.prepare()
+        try:
+            results = {
+                name: self.measure(request, options)
+                for name, request in self.routes().items()}
+        finally:
+            self.user.delete()
+        self.report(results)
+
+        path = Path(
+            options['baseline'] or BASELINE_DIR / f'baseline-{scale}.json')
+        if options['save_baseline']:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(
+                {'scale': scale, 'results': results}, indent=2) + '\n')
+            self.stdout.write(f'Базовая линия записана в {path}')
+        elif path.exists():
+            regressions = compare(
+                results, json.loads(path.read_text())['results'],
+                options['tolerance'])
+            if regressions:
+                raise CommandError(
+                    'Ухудшения относительно базовой линии:\n'
+                    + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS(
+                'Ухудшений относительно базовой линии нет'))
+
+    def prepare(self):
+        """Пользователь бенчмарка со своим постом и комментарием"""
+        self.target = Post.objects.filter(
+            feed_entry__isnull=False,
+            pub_date__lte=timezone.now()).select_related(
+                'author', 'category').order_by('-pub_date').first()
+        if self.target is None:
+            raise CommandError('Нет опубликованных постов.')
+        self.user, _ = get_user_model().objects.get_or_create(
+            username=BENCH_USERNAME)
+        self.post = Post.objects.create(
+            title='bench', text='bench', author=self.user,
+            category=self.target.category, pub_date=self.target.pub_date)
+        self.comment = Comment.objects.create(
+            text='bench', post=self.post, author=self.user)
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.client.force_login(self.user)
+
+    def routes(self):
+        """
+        Запрос для каждого маршрута blog и pages: метод, адрес, данные
+        и подготовительный запрос, время которого не учитывается
+        """
+        post = {'post_id': self.post.pk}
+        comment = {**post, 'comment_id': self.comment.pk}
+        author = {'username': self.target.author.username}
+        requests = {
+            'blog:index': ('get', reverse('blog:index')),
+            'blog:create_post': ('get', reverse('blog:create_post')),
+            'blog:edit_post': ('get', reverse('blog:edit_post', kwargs=post)),
+            'blog:delete_post': (
+                'get', reverse('blog:delete_post', kwargs=post)),
+            'blog:edit_profile': ('get', reverse('blog:edit_profile')),
+            'blog:profile': ('get', reverse('blog:profile', kwargs=author)),
+            'blog:follow': (
+                'post', reverse('blog:follow', kwargs=author), None,
+                reverse('blog:unfollow', kwargs=author)),
+            'blog:unfollow': (
+                'post', reverse('blog:unfollow', kwargs=author), None,
+                reverse('blog:follow', kwargs=author)),
+            'blog:follow_feed': ('get', reverse('blog:follow_feed')),
+            'blog:post_detail': ('get', reverse(
+                'blog:post_detail', kwargs={'post_id': self.target.pk})),
+            'blog:category_posts': ('get', reverse(
+                'blog:category_posts',
+                kwargs={'category_slug': self.target.category.slug})),
+            'blog:add_comment': (
+                'post', reverse('blog:add_comment', kwargs=post),
+                {'text': 'bench'}),
+            'blog:edit_comment': (
+                'get', reverse('blog:edit_comment', kwargs=comment)),
+            'blog:delete_comment': (
+                'get', reverse('blog:delete_comment', kwargs=comment)),
+            'pages:about': ('get', reverse('pages:about')),
+            'pages:rules': ('get', reverse('pages:rules')),
+        }
+        names = {
+            f'{module.app_name}:{pattern.name}'
+            for module in (blog_urls, pages_urls)
+            for pattern in module.urlpatterns}
+        if names - set(requests):
+            raise CommandError(
+                'Нет запроса для маршрутов: '
+                + ', '.join(sorted(names - set(requests))))
+        return requests
+
+    def send(self, method, url, data=None):
+        return getattr(self.client, method)(url, data)
+
+    def measure(self, request, options):
+        method, url, data, setup = (*request, None, None)[:4]
+        for _ in range(options['warmup']):
+            if setup:
+                self.send('post', setup)
+            self.send(method, url, data)
+        latencies = []
+        queries = 0
+        errors = 0
+        started = time.perf_counter()
+        for _ in range(options['requests']):
+            if setup:
+                self.send('post', setup)
+            if options['cold']:
+                cache.clear()
+            with record_queries() as log:
+                request_started = time.perf_counter()
+                response = self.send(method, url, data)
+                latencies.append(time.perf_counter() - request_started)
+            queries += len(log)
+            errors += response.status_code >= 400
+        stats = summarize(
+            latencies, time.perf_counter() - started, errors)
+        stats['queries'] = round(queries / options['requests'], 1)
+
+        if setup:
+            self.send('post', setup)
+        tracemalloc.start()
+        try:
+            self.send(method, url, data)
+            stats['peak_kib'] = round(
+                tracemalloc.get_traced_memory()[1] / 1024, 1)
+        finally:
+            tracemalloc.stop()
+        return stats
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"маршрут":<22}{"rps":>9}{"p50 ms":>9}{"p99 ms":>9}'
+            f'{"запросы":>9}{"пик KiB":>10}{"ошибки":>8}')
+        for name, stats in results.items():
+            self.stdout.write(
+                f'{name:<22}{stats["rps"]:>9}{stats["p50_ms"]:>9}'
+                f'{stats["p99_ms"]:>9}{stats["queries"]:>9}'
+                f'{stats["peak_kib"]:>10}{stats["errors"]:>8}')
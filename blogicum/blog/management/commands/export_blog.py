@@ -0,0 +1,69 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from blog import dumps
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает посты, комментарии, категории, '
+            'местоположения и пользователей в JSON Lines или CSV')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', default=list(dumps.EXPORT_MODELS),
+            help='Метки моделей, по умолчанию все: '
+                 + ', '.join(dumps.EXPORT_MODELS))
+        parser.add_argument('--output-dir', default='.')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), default='jsonl')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument(
+            '--since', help='Только строки, созданные после даты ISO 8601')
+        parser.add_argument(
+            '--after-id', type=int,
+            help='Только строки с первичным ключом больше заданного')
+        parser.add_argument(
+            '--state',
+            help='JSON с последними выгруженными ключами по моделям; '
+                 'читается перед выгрузкой и обновляется после')
+        parser.add_argument(
+            '--chunk-size', type=int, default=dumps.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError('--since: ожидается дата ISO 8601')
+        labels = [label.lower() for label in options['models']]
+        unknown = set(labels) - set(dumps.EXPORT_MODELS)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные модели: {", ".join(sorted(unknown))}')
+
+        state = Path(options['state']) if options['state'] else None
+        watermarks = {}
+        if state and state.exists():
+            watermarks = json.loads(state.read_text())
+        if options['after_id'] is not None:
+            watermarks.update(
+                (label, options['after_id']) for label in labels)
+
+        directory = Path(options['output_dir'])
+        directory.mkdir(parents=True, exist_ok=True)
+        started = time.monotonic()
+        counts = dumps.export(
+            directory, labels, file_format=options['format'],
+            compress=options['gzip'], since=since, watermarks=watermarks,
+            chunk_size=options['chunk_size'])
+        if state:
+            state.write_text(json.dumps(watermarks, indent=2))
+        for label, count in counts.items():
+            self.stdout.write(
+                f'{label}: {count}, последний ключ {watermarks.get(label)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено в {directory} за {time.monotonic() - started:.1f} с'))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.base import DeserializationError
+from django.db import IntegrityError
+
+from blog import dumps
+
+
+class Command(BaseCommand):
+    help = ('Загружает дампы dumpdata (JSON, JSON Lines, .gz) пачками '
+            'bulk_create и пересобирает ленту; замена loaddata для '
+            'больших дампов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument(
+            '--batch-size', type=int, default=dumps.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            counts = dumps.load(
+                options['paths'], batch_size=options['batch_size'],
+                progress=self.stdout.write)
+        except (OSError, ValueError, DeserializationError,
+                IntegrityError) as error:
+            raise CommandError(f'Не удалось загрузить дамп: {error}')
+        for label, count in sorted(counts.items()):
+            self.stdout.write(f'{label}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Объектов: {sum(counts.values())} '
+            f'за {time.monotonic() - started:.1f} с'))
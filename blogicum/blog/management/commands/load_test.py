@@ -0,0 +1,199 @@
+import json
+import math
+import random
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import NoReverseMatch, reverse
+
+from blog import feed
+from blog.views import COUNT_POSTS_ON_MAIN
+from core import loadgen
+
+LOAD_USERNAME = 'load-test'
+LOAD_PASSWORD = 'load-test-password'
+# Доли запросов по умолчанию.
+MIX = {
+    'index': 25,
+    'deep_page': 10,
+    'category': 15,
+    'detail': 30,
+    'profile': 5,
+    'comment': 10,
+    'login': 5,
+}
+SAMPLE_SIZE = 1000
+
+
+def parse_mix(value):
+    """Доли вида index=25,detail=30; остальные виды запросов не отправляются"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in MIX or not weight.isdigit():
+            raise CommandError(
+                f'--mix: ожидается вид=доля, виды: {", ".join(MIX)}')
+        mix[name] = int(weight)
+    return mix
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест WSGI-приложения: смесь запросов к главной, '
+            'глубоким страницам, категориям, постам, комментариям '
+            'и входу, либо воспроизведение записанного трафика. '
+            'Пропускная способность и перцентили задержки по маршрутам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--replay', nargs='+',
+            help='Файлы JSON Lines с записанными запросами, см. '
+                 'RequestRecordingMiddleware')
+        parser.add_argument(
+            '--mix', type=parse_mix, default=MIX,
+            help='Доли видов запросов: ' + ','.join(
+                f'{name}={weight}' for name, weight in MIX.items()))
+        parser.add_argument(
+            '--authenticated', type=float, default=0.2,
+            help='Доля GET-запросов от вошедшего пользователя')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument(
+            '--duration', type=float,
+            help='Длительность в секундах вместо количества запросов')
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument(
+            '--url',
+            help='Адрес запущенного сервера с той же базой; по умолчанию '
+                 'приложение вызывается тестовым клиентом в процессе')
+        target.add_argument(
+            '--wsgi', action='store_true',
+            help='Запустить blogicum.wsgi в многопоточном wsgiref-сервере')
+        parser.add_argument('--seed', type=int, help='Зерно генератора')
+        parser.add_argument('--output', help='Записать результаты в JSON')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        if options['replay']:
+            records = self.valid([
+                record for path in options['replay']
+                for record in loadgen.read_records(path)])
+        else:
+            records = self.build_mix(rng, options)
+        if not records:
+            raise CommandError('Нет запросов для отправки.')
+
+        user, _ = get_user_model().objects.get_or_create(
+            username=LOAD_USERNAME)
+        user.set_password(LOAD_PASSWORD)
+        user.save()
+        try:
+            results = self.run(records, options)
+        finally:
+            user.delete()
+        self.report(results)
+        if options['output']:
+            Path(options['output']).write_text(
+                json.dumps(results, indent=2) + '\n')
+
+    def run(self, records, options):
+        if options['wsgi']:
+            from blogicum.wsgi import application
+            server = loadgen.wsgi_server(application)
+        else:
+            server = nullcontext(options['url'])
+        with server as base_url:
+            def make_session(authenticated):
+                session = (loadgen.HTTPSession(base_url) if base_url
+                           else loadgen.ClientSession())
+                if authenticated:
+                    session.request('POST', reverse('login'), {
+                        'username': LOAD_USERNAME,
+                        'password': LOAD_PASSWORD})
+                return session
+
+            return loadgen.LoadGenerator(
+                records, make_session, self.prepare,
+                concurrency=options['concurrency'],
+                requests=None if options['duration'] else options['requests'],
+                duration=options['duration'],
+                random_seed=options['seed']).run()
+
+    def valid(self, records):
+        """Записи, адрес которых строится в этом дереве маршрутов"""
+        valid = []
+        for record in records:
+            try:
+                reverse(record['url_name'], kwargs=record.get('kwargs'))
+            except (KeyError, NoReverseMatch):
+                continue
+            valid.append(record)
+        if len(valid) < len(records):
+            self.stdout.write(
+                f'Пропущено записей: {len(records) - len(valid)}')
+        return valid
+
+    def build_mix(self, rng, options):
+        """SAMPLE_SIZE записей по долям --mix из случайных постов ленты"""
+        entries = list(feed.visible_entries().order_by('?').values_list(
+            'post_id', 'category_slug', 'author_username')[:SAMPLE_SIZE])
+        if not entries:
+            raise CommandError('Лента пуста, см. seed_blog.')
+        pages = max(math.ceil(
+            feed.visible_entries().count() / COUNT_POSTS_ON_MAIN), 1)
+
+        def record(url_name, kwargs=None, query='', method='GET',
+                   authenticated=None):
+            if authenticated is None:
+                authenticated = rng.random() < options['authenticated']
+            return {'method': method, 'url_name': url_name,
+                    'kwargs': kwargs or {}, 'query': query,
+                    'authenticated': authenticated}
+
+        def make(kind):
+            post_id, category_slug, username = rng.choice(entries)
+            return {
+                'index': lambda: record('blog:index'),
+                'deep_page': lambda: record(
+                    'blog:index',
+                    query=f'page={rng.randint(max(pages // 2, 1), pages)}'),
+                'category': lambda: record(
+                    'blog:category_posts', {'category_slug': category_slug}),
+                'detail': lambda: record(
+                    'blog:post_detail', {'post_id': post_id}),
+                'profile': lambda: record(
+                    'blog:profile', {'username': username}),
+                'comment': lambda: record(
+                    'blog:add_comment', {'post_id': post_id}, method='POST',
+                    authenticated=True),
+                'login': lambda: record(
+                    'login', method='POST', authenticated=False),
+            }[kind]()
+
+        kinds = rng.choices(
+            list(options['mix']), list(options['mix'].values()),
+            k=SAMPLE_SIZE)
+        return [make(kind) for kind in kinds]
+
+    def prepare(self, record):
+        url = reverse(record['url_name'], kwargs=record.get('kwargs'))
+        if record.get('query'):
+            url += '?' + record['query']
+        data = None
+        if record['url_name'] == 'blog:add_comment':
+            data = {'text': 'Комментарий нагрузочного теста'}
+        elif record['url_name'] == 'login':
+            data = {'username': LOAD_USERNAME, 'password': LOAD_PASSWORD}
+        return record.get('method', 'GET'), url, data
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"маршрут":<22}{"запросы":>9}{"rps":>9}{"p50 ms":>9}'
+            f'{"p95 ms":>9}{"p99 ms":>9}{"KiB":>8}{"ошибки":>8}')
+        for name, stats in results.items():
+            self.stdout.write(
+                f'{name:<22}{stats["requests"]:>9}{stats["rps"]:>9}'
+                f'{stats["p50_ms"]:>9}{stats["p95_ms"]:>9}'
+                f'{stats["p99_ms"]:>9}{stats["kib"]:>8}'
+                f'{stats["errors"]:>8}')
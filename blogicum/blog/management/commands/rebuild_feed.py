@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import feed
+
+
+class Command(BaseCommand):
+    help = 'Полностью пересобирает ленту опубликованных постов'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            created = feed.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в ленте: {created}'))
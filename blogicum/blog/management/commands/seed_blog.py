@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import seed
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу синтетическими пользователями, категориями, '
+            'местоположениями, постами и комментариями для нагрузочных '
+            'тестов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument(
+            '--users', type=int,
+            help='По умолчанию один пользователь на 20 постов')
+        parser.add_argument('--categories', type=int)
+        parser.add_argument('--locations', type=int)
+        parser.add_argument(
+            '--comments-per-post', type=float, default=5,
+            help='Среднее количество комментариев, распределение Парето')
+        parser.add_argument(
+            '--images', type=float, default=0,
+            help='Доля постов с картинкой')
+        parser.add_argument(
+            '--scheduled', type=float, default=0.02,
+            help='Доля отложенных постов')
+        parser.add_argument(
+            '--unpublished', type=float, default=0.03,
+            help='Доля снятых с публикации постов')
+        parser.add_argument(
+            '--unpublished-categories', type=float, default=0.1,
+            help='Доля снятых с публикации категорий и местоположений')
+        parser.add_argument('--batch-size', type=int, default=seed.BATCH_SIZE)
+        parser.add_argument('--seed', type=int, help='Зерно генератора')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        counts = seed.seed(
+            options['posts'], users=options['users'],
+            categories=options['categories'],
+            locations=options['locations'],
+            comments_per_post=options['comments_per_post'],
+            images=options['images'], scheduled=options['scheduled'],
+            unpublished=options['unpublished'],
+            unpublished_categories=options['unpublished_categories'],
+            batch_size=options['batch_size'], random_seed=options['seed'],
+            progress=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{name}: {count}' for name, count in counts.items())
+            + f' за {time.monotonic() - started:.1f} с'))
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.1 on 2026-10-19 08:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils.text import Truncator
+
+
+def fill_feed(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    FeedEntry = apps.get_model('blog', 'FeedEntry')
+    posts = Post.objects.select_related(
+        'author', 'category', 'location').filter(
+            is_published=True, category__is_published=True).annotate(
+                comment_count=Count('comments'))
+    FeedEntry.objects.bulk_create((
+        FeedEntry(
+            post_id=post.pk,
+            pub_date=post.pub_date,
+            author_id=post.author_id,
+            author_username=post.author.username,
+            category_id=post.category_id,
+            category_title=post.category.title,
+            category_slug=post.category.slug,
+            location_name=(
+                post.location.name
+                if post.location and post.location.is_published else ''),
+            title=post.title,
+            text=Truncator(post.text).words(10),
+            image=post.image.name or '',
+            comment_count=post.comment_count,
+        ) for post in posts.iterator(chunk_size=2000)), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_remove_comment_postlink_comment_post'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'default_related_name': 'comments', 'ordering': ('created_at',), 'verbose_name': 'комментарий', 'verbose_name_plural': 'Комментарии'},
+        ),
+        migrations.AlterModelOptions(
+            name='post',
+            options={'default_related_name': 'posts', 'ordering': ('-pub_date',), 'verbose_name': 'публикация', 'verbose_name_plural': 'Публикации'},
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='blog.post'),
+        ),
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_entry', serialize=False, to='blog.post')),
+                ('pub_date', models.DateTimeField()),
+                ('author_username', models.CharField(max_length=150)),
+                ('category_title', models.CharField(blank=True, max_length=256)),
+                ('category_slug', models.SlugField()),
+                ('location_name', models.CharField(blank=True, max_length=256)),
+                ('title', models.CharField(blank=True, max_length=256)),
+                ('text', models.TextField(blank=True)),
+                ('image', models.ImageField(blank=True, upload_to='post_images')),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='blog.category')),
+            ],
+            options={
+                'verbose_name': 'запись ленты',
+                'verbose_name_plural': 'Лента',
+                'ordering': ('-pub_date',),
+                'default_related_name': 'feed_entries',
+                'indexes': [models.Index(fields=['-pub_date'], name='feed_pub_date_idx'), models.Index(fields=['category', '-pub_date'], name='feed_category_idx'), models.Index(fields=['author', '-pub_date'], name='feed_author_idx')],
+            },
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.1 on 2026-10-19 08:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Триграммные индексы под поиск в админке: icontains на PostgreSQL
+# превращается в UPPER(column::text) LIKE UPPER(...).
+TRIGRAM_INDEXES = (
+    ('Post', 'title', 'post_title_trgm_idx'),
+    ('Category', 'title', 'category_title_trgm_idx'),
+    ('Location', 'name', 'location_name_trgm_idx'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for model_name, column, name in TRIGRAM_INDEXES:
+        table = apps.get_model('blog', model_name)._meta.db_table
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} '
+            f'USING gin ((UPPER({quote(column)}::text)) gin_trgm_ops)')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, _, name in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_follow_timelineentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-pub_date'], name='post_published_pub_date_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
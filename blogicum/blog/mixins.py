@@ -1,8 +1,22 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+import logging
+
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
 
-from .models import Comment
+from core import metrics
+from core.db import query_time_budget
+from core.stampede import get_or_compute, make_key
+
+from . import feed
+from .counters import CountedPaginator
+from .models import Comment, FeedEntry
+
+logger = logging.getLogger(__name__)
 
 
 class UserCommentAuthorMixin(LoginRequiredMixin, UserPassesTestMixin):
@@ -42,3 +56,116 @@ class UserPostMixin(LoginRequiredMixin, UserPassesTestMixin):
             reverse(
                 'blog:post_detail',
                 kwargs={'post_id': self.kwargs['post_id']}))
+
+
+class CountedPaginationMixin:
+    """
+    Миксин для лент постов: количество постов для пагинатора
+    берётся из кэша счётчиков по ключу get_count_key().
+    """
+
+    paginator_class = CountedPaginator
+
+    def get_count_key(self):
+        return None
+
+    def get_count_filters(self):
+        """Фильтр ленты для поиска отложенных постов"""
+        return None
+
+    def get_paginator(self, *args, **kwargs):
+        filters = self.get_count_filters()
+        if filters is not None:
+            kwargs['count_scheduled'] = FeedEntry.objects.filter(**filters)
+        return super().get_paginator(
+            *args, count_key=self.get_count_key(), **kwargs)
+
+
+class FeedEntryListMixin:
+    """
+    Миксин для лент, читающих записи FeedEntry:
+    на страницу попадают посты, собранные из записей ленты.
+
+    Если get_feed_key() возвращает ключ, страница постов и её
+    отрендеренный фрагмент кэшируются с защитой от одновременного
+    пересчёта; ключ включает версию лент и количество постов.
+    """
+
+    feed_cache_key = None
+
+    def get_feed_key(self):
+        return self.get_count_key()
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page, object_list, is_paginated = super(
+        ).paginate_queryset(queryset, page_size)
+        feed_key = self.get_feed_key()
+        if feed_key is not None:
+            self.feed_cache_key = make_key(
+                'feed', feed.get_version(), feed_key, paginator.count,
+                page.number)
+            page.object_list = get_or_compute(
+                self.feed_cache_key, lambda: self.build_posts(page),
+                settings.FEED_CACHE_TIMEOUT)
+        else:
+            page.object_list = self.build_posts(page)
+        return paginator, page, page.object_list, is_paginated
+
+    def build_posts(self, page):
+        return [
+            item.as_post() if isinstance(item, FeedEntry) else item
+            for item in page.object_list]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['feed_cache_key'] = self.feed_cache_key
+        return context
+
+
+class StaleOnErrorMixin:
+    """
+    Миксин для страниц чтения: если база недоступна, заблокирована
+    или запросы не уложились в STALE_TIME_BUDGET секунд, отдаётся
+    последняя удачная отрисовка страницы с заголовком X-Served-Stale.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        key = make_key('stale', request.get_full_path(), request.user.pk)
+        try:
+            with query_time_budget(settings.STALE_TIME_BUDGET):
+                response = super().dispatch(request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+        except DatabaseError as error:
+            stale = cache.get(key)
+            if stale is None:
+                raise
+            view_name = request.resolver_match.view_name
+            logger.warning('Отдана устаревшая страница %s: %s',
+                           request.path, error)
+            metrics.inc('stale_responses_total', view=view_name)
+            content, content_type = stale
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Served-Stale'] = '1'
+            return response
+        if response.status_code == 200:
+            cache.set(key, (response.content, response['Content-Type']),
+                      settings.STALE_RENDER_TIMEOUT)
+        return response
+
+
+class WriteTransactionMixin:
+    """
+    Миксин для изменяющих данные страниц: POST-запрос целиком
+    выполняется в одной транзакции. На SQLite она начинается
+    с BEGIN IMMEDIATE (см. transaction_mode в настройках).
+    После записи автор какое-то время читает с основной базы.
+    """
+
+    read_your_writes = True
+
+    def post(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().post(request, *args, **kwargs)
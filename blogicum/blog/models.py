@@ -1,10 +1,12 @@
 from django.db import models
+from django.utils.text import Truncator
 from django.contrib.auth import get_user_model
 
 from core.models import PublishedModel
 
 
 MAX_LENGTH_FIELD = 256
+CARD_TEXT_WORDS = 10
 
 User = get_user_model()
 
@@ -70,6 +72,11 @@ class Post(PublishedModel):
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        indexes = (
+            models.Index(fields=('-pub_date',),
+                         condition=models.Q(is_published=True),
+                         name='post_published_pub_date_idx'),
+        )
 
     def __str__(self):
         return self.title
@@ -94,3 +101,135 @@ class Comment(models.Model):
 
     def __str__(self):
         return self.text
+
+
+class FeedEntry(models.Model):
+    """
+    Запись ленты: денормализованная карточка опубликованного поста.
+
+    Хранит посты, опубликованные в опубликованных категориях, в том числе
+    отложенные: они отсекаются условием по pub_date при чтении.
+    """
+
+    post = models.OneToOneField(Post, primary_key=True,
+                                on_delete=models.CASCADE,
+                                related_name='feed_entry')
+    pub_date = models.DateTimeField()
+    author = models.ForeignKey(User, on_delete=models.CASCADE)
+    author_username = models.CharField(max_length=150)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    category_title = models.CharField(max_length=MAX_LENGTH_FIELD,
+                                      blank=True)
+    category_slug = models.SlugField()
+    location_name = models.CharField(max_length=MAX_LENGTH_FIELD,
+                                     blank=True)
+    title = models.CharField(max_length=MAX_LENGTH_FIELD, blank=True)
+    text = models.TextField(blank=True)
+    image = models.ImageField(upload_to='post_images', blank=True)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        ordering = ('-pub_date',)
+        default_related_name = 'feed_entries'
+        indexes = [
+            models.Index(fields=['-pub_date'], name='feed_pub_date_idx'),
+            models.Index(fields=['category', '-pub_date'],
+                         name='feed_category_idx'),
+            models.Index(fields=['author', '-pub_date'],
+                         name='feed_author_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @classmethod
+    def card_fields(cls, post):
+        """Поля карточки поста для записи ленты"""
+        location = post.location
+        return {
+            'pub_date': post.pub_date,
+            'author_id': post.author_id,
+            'author_username': post.author.username,
+            'category_id': post.category_id,
+            'category_title': post.category.title,
+            'category_slug': post.category.slug,
+            'location_name': (
+                location.name if location and location.is_published else ''),
+            'title': post.title,
+            'text': Truncator(post.text).words(CARD_TEXT_WORDS),
+            'image': post.image.name or '',
+        }
+
+    def as_post(self):
+        """Пост, собранный из записи ленты без обращения к базе"""
+        post = Post(id=self.post_id, title=self.title, text=self.text,
+                    pub_date=self.pub_date, image=self.image.name,
+                    is_published=True)
+        post.author = User(id=self.author_id, username=self.author_username)
+        post.category = Category(id=self.category_id,
+                                 title=self.category_title,
+                                 slug=self.category_slug, is_published=True)
+        post.location = (
+            Location(name=self.location_name, is_published=True)
+            if self.location_name else None)
+        post.comment_count = self.comment_count
+        return post
+
+
+class Follow(models.Model):
+    """
+    Модель подписки на автора.
+
+    Флаг fanout показывает, раскладываются ли новые посты автора
+    в ленту подписчика при записи. Для авторов с огромным числом
+    подписчиков он снят, и их посты подмешиваются в ленту при чтении.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='following',
+                             verbose_name='Подписчик')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='followers',
+                               verbose_name='Автор')
+    fanout = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True,
+                                      verbose_name='Добавлено')
+
+    class Meta:
+        verbose_name = 'подписка'
+        verbose_name_plural = 'Подписки'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+            models.CheckConstraint(condition=~models.Q(
+                user=models.F('author')), name='no_self_follow'),
+        ]
+        indexes = [
+            models.Index(fields=['author', 'fanout'],
+                         name='follow_author_fanout_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Запись ленты подписок пользователя"""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    entry = models.ForeignKey(FeedEntry, on_delete=models.CASCADE)
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ('-pub_date',)
+        default_related_name = 'timeline_entries'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'entry'],
+                                    name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date'],
+                         name='timeline_user_idx'),
+        ]
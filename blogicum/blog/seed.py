@@ -0,0 +1,224 @@
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from . import feed, signals
+from .models import Category, Comment, Location, Post, User
+
+BATCH_SIZE = 5000
+SEED_PASSWORD = 'seed-password'
+TEXT_POOL_SIZE = 500
+IMAGE_VARIANTS = 8
+# Хвост распределения Парето: у немногих постов сотни комментариев,
+# у большинства — единицы.
+COMMENTS_PARETO_ALPHA = 1.5
+MAX_COMMENTS_PER_POST = 1000
+SCHEDULED_DAYS = 30
+PAST_DAYS = 365 * 3
+
+
+def scale_counts(posts):
+    """Количество объектов, пропорциональное количеству постов"""
+    return {
+        'users': max(posts // 20, 10),
+        'categories': max(posts // 1000, 5),
+        'locations': max(posts // 500, 5),
+        'posts': posts,
+        'comments': posts * 5,
+    }
+
+
+class TextPool:
+    """
+    Заранее сгенерированные Faker тексты: генерировать текст
+    для каждого из миллионов объектов слишком долго
+    """
+
+    def __init__(self, rng):
+        fake = Faker('ru_RU')
+        fake.seed_instance(rng.random())
+        self.rng = rng
+        self.words = [fake.word() for _ in range(TEXT_POOL_SIZE)]
+        self.sentences = [fake.sentence() for _ in range(TEXT_POOL_SIZE)]
+        self.cities = [fake.city() for _ in range(TEXT_POOL_SIZE)]
+        self.first_names = [fake.first_name() for _ in range(TEXT_POOL_SIZE)]
+        self.last_names = [fake.last_name() for _ in range(TEXT_POOL_SIZE)]
+
+    def title(self):
+        return ' '.join(self.rng.choices(self.words, k=4)).capitalize()
+
+    def text(self, sentences):
+        return ' '.join(self.rng.choices(self.sentences, k=sentences))
+
+
+class SkewedChoice:
+    """
+    Случайный элемент с перекосом к началу списка: первые авторы
+    пишут большую часть постов
+    """
+
+    def __init__(self, rng, items, power=3):
+        self.rng = rng
+        self.items = items
+        self.power = power
+
+    def __call__(self):
+        index = int(len(self.items) * self.rng.random() ** self.power)
+        return self.items[index]
+
+
+def comments_for_post(rng, mean):
+    """Количество комментариев с тяжёлым хвостом и средним mean"""
+    alpha = COMMENTS_PARETO_ALPHA
+    scale = mean / (alpha / (alpha - 1) - 1)
+    return min(int(scale * (rng.paretovariate(alpha) - 1)),
+               MAX_COMMENTS_PER_POST)
+
+
+def create_in_batches(model, objects, batch_size=BATCH_SIZE):
+    """bulk_create пачками, каждая пачка в своей транзакции"""
+    created = []
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            with transaction.atomic():
+                created.extend(
+                    obj.pk for obj in model.objects.bulk_create(batch))
+            batch = []
+    with transaction.atomic():
+        created.extend(obj.pk for obj in model.objects.bulk_create(batch))
+    return created
+
+
+def make_images(rng, token):
+    """Несколько небольших JPEG, общих для всех постов с картинками"""
+    names = []
+    for number in range(IMAGE_VARIANTS):
+        image = Image.new('RGB', (800, 600), tuple(
+            rng.randrange(256) for _ in range(3)))
+        content = BytesIO()
+        image.save(content, 'JPEG', quality=70)
+        names.append(default_storage.save(
+            f'post_images/seed-{token}-{number}.jpg',
+            ContentFile(content.getvalue())))
+    return names
+
+
+@contextmanager
+def fast_sqlite_writes():
+    """Без fsync на каждую транзакцию, пока идёт загрузка в SQLite"""
+    # Внутри транзакции SQLite не меняет synchronous.
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        synchronous = cursor.fetchone()[0]
+        cursor.execute('PRAGMA synchronous = OFF')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA synchronous = {synchronous}')
+
+
+def seed(posts, users=None, categories=None, locations=None,
+         comments_per_post=5, images=0.0, scheduled=0.02, unpublished=0.03,
+         unpublished_categories=0.1, batch_size=BATCH_SIZE,
+         random_seed=None, progress=None):
+    """
+    Наполняет базу синтетическими данными и пересобирает ленту.
+
+    Количество пользователей, категорий и местоположений по умолчанию
+    пропорционально постам. Комментарии распределены по Парето, авторы
+    постов — с перекосом к первым пользователям. Доли scheduled
+    и unpublished постов получают дату в будущем и снятую публикацию,
+    доля images — картинку. Вставка идёт bulk_create без сигналов
+    блога, каждая пачка в отдельной транзакции.
+    """
+    rng = random.Random(random_seed)
+    defaults = scale_counts(posts)
+    counts = {
+        'users': users or defaults['users'],
+        'categories': categories or defaults['categories'],
+        'locations': locations or defaults['locations'],
+        'posts': posts,
+        'comments': 0,
+    }
+    progress = progress or (lambda message: None)
+    texts = TextPool(rng)
+    token = uuid.uuid4().hex[:6]
+    password = make_password(SEED_PASSWORD)
+    now = timezone.now()
+    image_names = make_images(rng, token) if images else []
+
+    with signals.muted(), fast_sqlite_writes():
+        user_ids = create_in_batches(User, (
+            User(username=f'seed-{token}-{number}', password=password,
+                 first_name=rng.choice(texts.first_names),
+                 last_name=rng.choice(texts.last_names))
+            for number in range(counts['users'])), batch_size)
+        progress(f'Пользователей: {len(user_ids)}')
+        category_ids = create_in_batches(Category, (
+            Category(title=texts.title(), description=texts.text(2),
+                     slug=f'seed-{token}-{number}',
+                     is_published=rng.random() >= unpublished_categories)
+            for number in range(counts['categories'])), batch_size)
+        location_ids = create_in_batches(Location, (
+            Location(name=rng.choice(texts.cities),
+                     is_published=rng.random() >= unpublished_categories)
+            for _ in range(counts['locations'])), batch_size)
+        progress(f'Категорий: {len(category_ids)}, '
+                 f'местоположений: {len(location_ids)}')
+
+        choose_author = SkewedChoice(rng, user_ids)
+        choose_commenter = SkewedChoice(rng, user_ids, power=2)
+
+        def make_post():
+            if rng.random() < scheduled:
+                pub_date = now + timedelta(
+                    minutes=rng.randrange(1, SCHEDULED_DAYS * 24 * 60))
+            else:
+                pub_date = now - timedelta(
+                    minutes=rng.randrange(PAST_DAYS * 24 * 60))
+            return Post(
+                title=texts.title(), text=texts.text(rng.randint(3, 20)),
+                pub_date=pub_date, author_id=choose_author(),
+                category_id=rng.choice(category_ids),
+                location_id=(rng.choice(location_ids)
+                             if rng.random() < 0.7 else None),
+                is_published=rng.random() >= unpublished,
+                image=(rng.choice(image_names)
+                       if image_names and rng.random() < images else ''))
+
+        for start in range(0, posts, batch_size):
+            post_ids = create_in_batches(Post, (
+                make_post() for _ in range(min(batch_size, posts - start))),
+                batch_size)
+            counts['comments'] += len(create_in_batches(Comment, (
+                Comment(text=texts.text(rng.randint(1, 4)), post_id=post_id,
+                        author_id=choose_commenter())
+                for post_id in post_ids
+                for _ in range(comments_for_post(rng, comments_per_post))),
+                batch_size))
+            progress(f'Постов: {start + len(post_ids)}, '
+                     f'комментариев: {counts["comments"]}')
+
+        with transaction.atomic():
+            feed.rebuild()
+    # Счётчики лент считались до наполнения.
+    cache.clear()
+    progress('Лента пересобрана')
+    return counts
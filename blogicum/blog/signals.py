@@ -0,0 +1,197 @@
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.contrib.auth import get_user_model
+from django.dispatch import receiver as django_receiver
+from django.utils import timezone
+
+from . import counters, feed
+from .models import Category, Comment, Location, Post
+
+_muted = ContextVar('blog_signals_muted', default=False)
+
+
+@contextmanager
+def muted():
+    """
+    Отключает обработчики этого модуля внутри блока, например при
+    массовой загрузке. Ленту и счётчики затем нужно пересобрать.
+    """
+    token = _muted.set(True)
+    try:
+        yield
+    finally:
+        _muted.reset(token)
+
+
+def receiver(signal, **options):
+    """django.dispatch.receiver, пропускающий сигналы внутри muted()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _muted.get():
+                return func(*args, **kwargs)
+        return django_receiver(signal, **options)(wrapper)
+    return decorator
+
+
+POST_STATE_FIELDS = ('is_published', 'pub_date', 'author_id', 'category_id',
+                     'category__is_published')
+
+
+def get_post_state(post):
+    """Поля поста, от которых зависит его видимость в лентах"""
+    return {
+        'is_published': post.is_published,
+        'pub_date': post.pub_date,
+        'author_id': post.author_id,
+        'category_id': post.category_id,
+        'category__is_published': (
+            post.category_id is not None and post.category.is_published),
+    }
+
+
+def is_listed(state):
+    """Пост опубликован в опубликованной категории (возможно, отложенно)"""
+    return bool(state and state['is_published']
+                and state['category__is_published'])
+
+
+def is_visible(state):
+    return is_listed(state) and state['pub_date'] <= timezone.now()
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_state(sender, instance, raw=False, **kwargs):
+    """Запоминает состояние поста до сохранения"""
+    instance._saved_state = None
+    if not raw and instance.pk is not None:
+        instance._saved_state = Post.objects.filter(
+            pk=instance.pk).values(*POST_STATE_FIELDS).first()
+
+
+@receiver(post_save, sender=Post)
+def update_counts_on_save(sender, instance, created, raw=False, **kwargs):
+    """Обновляет счётчики лент после сохранения поста"""
+    if raw:
+        return
+    old = getattr(instance, '_saved_state', None)
+    new = get_post_state(instance)
+    if created:
+        counters.adjust(
+            [counters.count_key(author_id=new['author_id'],
+                                add_filter=False)], 1)
+    elif old and old['author_id'] != new['author_id']:
+        counters.adjust([counters.count_key(
+            author_id=old['author_id'], add_filter=False)], -1)
+        counters.adjust([counters.count_key(
+            author_id=new['author_id'], add_filter=False)], 1)
+
+    old_keys = (
+        counters.visible_keys(old['author_id'], old['category_id'])
+        if is_visible(old) else [])
+    new_keys = (
+        counters.visible_keys(new['author_id'], new['category_id'])
+        if is_visible(new) else [])
+    counters.adjust([key for key in old_keys if key not in new_keys], -1)
+    counters.adjust([key for key in new_keys if key not in old_keys], 1)
+    if is_listed(new) and not is_visible(new):
+        counters.schedule_refresh(
+            counters.visible_keys(new['author_id'], new['category_id']),
+            new['pub_date'])
+
+
+@receiver(post_delete, sender=Post)
+def update_counts_on_delete(sender, instance, **kwargs):
+    """Обновляет счётчики лент после удаления поста"""
+    counters.adjust([counters.count_key(
+        author_id=instance.author_id, add_filter=False)], -1)
+    try:
+        state = get_post_state(instance)
+    except Category.DoesNotExist:
+        # Категорию удалили вместе с постом: её счётчики уже сброшены.
+        return
+    if is_visible(state):
+        counters.adjust(
+            counters.visible_keys(state['author_id'], state['category_id']),
+            -1)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_state(sender, instance, raw=False, **kwargs):
+    """Запоминает, была ли категория опубликована до сохранения"""
+    instance._was_published = None
+    if not raw and instance.pk is not None:
+        instance._was_published = Category.objects.filter(
+            pk=instance.pk).values_list('is_published', flat=True).first()
+
+
+def invalidate_category_counts(category):
+    author_ids = Post.objects.filter(category=category).values_list(
+        'author_id', flat=True).distinct()
+    counters.invalidate(
+        [counters.count_key(), counters.count_key(category_id=category.pk)]
+        + [counters.count_key(author_id=author_id)
+           for author_id in author_ids])
+
+
+@receiver(post_save, sender=Category)
+def update_counts_on_category_save(sender, instance, raw=False, **kwargs):
+    """Сбрасывает счётчики при снятии категории с публикации и обратно"""
+    if raw:
+        return
+    was_published = getattr(instance, '_was_published', None)
+    if was_published is not None and was_published != instance.is_published:
+        invalidate_category_counts(instance)
+
+
+@receiver(pre_delete, sender=Category)
+def update_counts_on_category_delete(sender, instance, **kwargs):
+    """Сбрасывает счётчики: посты удаляемой категории пропадают из лент"""
+    invalidate_category_counts(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_feed_on_post_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        feed.sync_post(instance)
+
+
+@receiver(post_save, sender=Category)
+def update_feed_on_category_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        feed.sync_category(instance)
+
+
+@receiver(post_save, sender=Location)
+def update_feed_on_location_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        feed.sync_location(instance)
+
+
+@receiver(pre_delete, sender=Location)
+def update_feed_on_location_delete(sender, instance, **kwargs):
+    feed.sync_location(instance, deleted=True)
+
+
+@receiver(post_save, sender=get_user_model())
+def update_feed_on_user_save(sender, instance, raw=False, update_fields=None,
+                             **kwargs):
+    if raw or (update_fields and 'username' not in update_fields):
+        return
+    feed.sync_author(instance)
+
+
+@receiver(post_save, sender=Comment)
+def update_feed_on_comment_save(sender, instance, created, raw=False,
+                                **kwargs):
+    if created and not raw:
+        feed.change_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def update_feed_on_comment_delete(sender, instance, **kwargs):
+    feed.change_comment_count(instance.post_id, -1)
@@ -0,0 +1,100 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import FeedEntry, Follow, TimelineEntry
+
+FANOUT_BATCH_SIZE = 2000
+
+
+def fan_out(entry):
+    """Раскладывает запись ленты по лентам подписчиков автора"""
+    followers = Follow.objects.filter(
+        author_id=entry.author_id, fanout=True).values_list(
+            'user_id', flat=True)
+    batch = []
+    for user_id in followers.iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.append(TimelineEntry(
+            user_id=user_id, entry=entry, pub_date=entry.pub_date))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_many(entries):
+    """Раскладка пачки записей при пересборке ленты"""
+    followers = defaultdict(list)
+    for user_id, author_id in Follow.objects.filter(
+            author_id__in={entry.author_id for entry in entries},
+            fanout=True).values_list('user_id', 'author_id'):
+        followers[author_id].append(user_id)
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, entry=entry, pub_date=entry.pub_date)
+         for entry in entries for user_id in followers[entry.author_id]),
+        batch_size=FANOUT_BATCH_SIZE, ignore_conflicts=True)
+
+
+def move_entry(entry):
+    """Переносит запись в лентах подписчиков после смены даты"""
+    TimelineEntry.objects.filter(entry=entry).exclude(
+        pub_date=entry.pub_date).update(pub_date=entry.pub_date)
+
+
+@transaction.atomic
+def follow(user, author):
+    """
+    Подписывает пользователя на автора.
+
+    Когда у автора набирается TIMELINE_FANOUT_LIMIT подписчиков,
+    раскладка его постов при записи отключается для всех подписок,
+    а уже разложенные записи удаляются.
+    """
+    follow, created = Follow.objects.get_or_create(user=user, author=author)
+    if not created:
+        return follow
+    celebrity = Follow.objects.filter(author=author, fanout=False).exists()
+    if not celebrity and (Follow.objects.filter(author=author).count()
+                          >= settings.TIMELINE_FANOUT_LIMIT):
+        Follow.objects.filter(author=author).update(fanout=False)
+        TimelineEntry.objects.filter(entry__author=author).delete()
+        celebrity = True
+    if celebrity:
+        follow.fanout = False
+        Follow.objects.filter(pk=follow.pk).update(fanout=False)
+        return follow
+    recent = FeedEntry.objects.filter(author=author).values_list(
+        'pk', 'pub_date')[:settings.TIMELINE_BACKFILL]
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user=user, entry_id=pk, pub_date=pub_date)
+         for pk, pub_date in recent], ignore_conflicts=True)
+    return follow
+
+
+@transaction.atomic
+def unfollow(user, author):
+    Follow.objects.filter(user=user, author=author).delete()
+    TimelineEntry.objects.filter(user=user, entry__author=author).delete()
+
+
+def timeline_entries(user):
+    """
+    Записи ленты подписок пользователя.
+
+    Разложенная лента читается одним проходом по индексу
+    (user, pub_date); посты авторов без раскладки подмешиваются при чтении.
+    """
+    now = timezone.now()
+    pulled = Follow.objects.filter(user=user, fanout=False).values_list(
+        'author_id', flat=True)
+    if not pulled.exists():
+        return FeedEntry.objects.filter(
+            timeline_entries__user=user,
+            timeline_entries__pub_date__lte=now).order_by(
+                '-timeline_entries__pub_date')
+    return FeedEntry.objects.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('entry'))
+        | Q(author__in=pulled), pub_date__lte=now)
@@ -4,9 +4,13 @@ from . import views
 
 app_name = 'blog'
 
+# Сроки на запросы к базе для страниц, в миллисекундах.
+FEED_DEADLINE = {'query_deadline': 1000}
+DETAIL_DEADLINE = {'query_deadline': 1500}
+
 
 urlpatterns = [
-    path('', views.Index.as_view(), name='index'),
+    path('', views.Index.as_view(), FEED_DEADLINE, name='index'),
     path('posts/create/', views.PostCreateView.as_view(), name='create_post'),
     path('posts/<int:post_id>/edit/', views.PostEditView.as_view(),
          name='edit_post'),
@@ -15,11 +19,17 @@ urlpatterns = [
     path('edit_profile/', views.EditProfileView.as_view(),
          name='edit_profile'),
     path('profile/<str:username>/', views.ProfileUser.as_view(),
-         name='profile'),
+         FEED_DEADLINE, name='profile'),
+    path('profile/<str:username>/follow/', views.FollowAuthorView.as_view(),
+         name='follow'),
+    path('profile/<str:username>/unfollow/',
+         views.UnfollowAuthorView.as_view(), name='unfollow'),
+    path('follow/', views.FollowFeed.as_view(), FEED_DEADLINE,
+         name='follow_feed'),
     path('posts/<int:post_id>/', views.PostDetailView.as_view(),
-         name='post_detail'),
+         DETAIL_DEADLINE, name='post_detail'),
     path('category/<slug:category_slug>/', views.CategoryPosts.as_view(),
-         name='category_posts'),
+         FEED_DEADLINE, name='category_posts'),
     path('posts/<int:post_id>/comment/', views.CommentCreateView.as_view(),
          name='add_comment'),
     path('posts/<int:post_id>/edit_comment/<int:comment_id>',
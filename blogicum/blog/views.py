@@ -1,4 +1,4 @@
-from django.shortcuts import get_object_or_404
+from django.shortcuts import get_object_or_404, redirect
 from django.http import Http404
 from django.db.models import Count
 from django.utils import timezone
@@ -6,12 +6,17 @@ from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import (CreateView, DeleteView, ListView,
-                                  UpdateView, DetailView)
+                                  UpdateView, DetailView, View)
 from django.urls import reverse_lazy
 
+from core.stampede import make_key
+
+from . import counters, feed, timeline
 from .forms import CommentForm, PostForm, UserProfileForm
-from .models import Post, Category, Comment
-from .mixins import UserCommentAuthorMixin, UserPostMixin
+from .models import Post, Category, Comment, Follow
+from .mixins import (CountedPaginationMixin, FeedEntryListMixin,
+                     StaleOnErrorMixin, UserCommentAuthorMixin,
+                     UserPostMixin, WriteTransactionMixin)
 
 COUNT_POSTS_ON_MAIN = 10
 
@@ -31,17 +36,25 @@ def get_posts(add_filter=False, add_comments=False):
     return query_set
 
 
-class Index(ListView):
+class Index(StaleOnErrorMixin, CountedPaginationMixin, FeedEntryListMixin,
+            ListView):
     """Отображает главную страницу"""
 
     template_name = 'blog/index.html'
     paginate_by = COUNT_POSTS_ON_MAIN
 
     def get_queryset(self):
-        return get_posts(add_filter=True, add_comments=True)
+        return feed.visible_entries()
+
+    def get_count_key(self):
+        return counters.count_key()
+
+    def get_count_filters(self):
+        return {}
 
 
-class CategoryPosts(ListView):
+class CategoryPosts(StaleOnErrorMixin, CountedPaginationMixin,
+                    FeedEntryListMixin, ListView):
     """Страница категории постов"""
 
     model = Post
@@ -49,23 +62,29 @@ class CategoryPosts(ListView):
     paginate_by = COUNT_POSTS_ON_MAIN
 
     def get_queryset(self):
-        return get_posts(
-            add_filter=True,
-            add_comments=True).filter(category=self.get_category())
+        return feed.visible_entries(category=self.get_category())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['category'] = self.get_category()
         return context
 
+    def get_count_key(self):
+        return counters.count_key(category_id=self.get_category().pk)
+
+    def get_count_filters(self):
+        return {'category': self.get_category()}
+
     def get_category(self):
         """Получение категории"""
-        return get_object_or_404(
-            Category, slug=self.kwargs.get(
-                'category_slug'), is_published=True)
+        if not hasattr(self, '_category'):
+            self._category = get_object_or_404(
+                Category, slug=self.kwargs.get(
+                    'category_slug'), is_published=True)
+        return self._category
 
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+class PostCreateView(LoginRequiredMixin, WriteTransactionMixin, CreateView):
     """Создание поста"""
 
     template_name = 'blog/create.html'
@@ -81,7 +100,7 @@ class PostCreateView(LoginRequiredMixin, CreateView):
             'blog:profile', kwargs={'username': self.request.user.username})
 
 
-class PostDetailView(DetailView):
+class PostDetailView(StaleOnErrorMixin, DetailView):
     """Подробное описание поста"""
 
     model = Post
@@ -102,13 +121,15 @@ class PostDetailView(DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
+        context['post_cache_key'] = make_key(
+            'post', feed.get_version(), self.object.pk)
         context['comments'] = (
             self.object.comments.select_related('author')
         )
         return context
 
 
-class PostEditView(UserPostMixin, UpdateView):
+class PostEditView(UserPostMixin, WriteTransactionMixin, UpdateView):
     """Редактирование поста"""
 
     model = Post
@@ -121,7 +142,7 @@ class PostEditView(UserPostMixin, UpdateView):
             'blog:post_detail', kwargs={'post_id': self.kwargs['post_id']})
 
 
-class PostDeleteView(UserPostMixin, DeleteView):
+class PostDeleteView(UserPostMixin, WriteTransactionMixin, DeleteView):
     """Удаление поста"""
 
     model = Post
@@ -130,7 +151,8 @@ class PostDeleteView(UserPostMixin, DeleteView):
     pk_url_kwarg = 'post_id'
 
 
-class CommentCreateView(LoginRequiredMixin, CreateView):
+class CommentCreateView(LoginRequiredMixin, WriteTransactionMixin,
+                        CreateView):
     """Создание комментарией к посту"""
 
     model = Comment
@@ -147,7 +169,8 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
             'blog:post_detail', kwargs={'post_id': self.kwargs['post_id']})
 
 
-class CommentEditView(UserCommentAuthorMixin, UpdateView):
+class CommentEditView(UserCommentAuthorMixin, WriteTransactionMixin,
+                      UpdateView):
     """Редактирование комментарием"""
 
     model = Comment
@@ -155,14 +178,16 @@ class CommentEditView(UserCommentAuthorMixin, UpdateView):
     template_name = 'blog/comment.html'
 
 
-class CommentDeleteView(UserCommentAuthorMixin, DeleteView):
+class CommentDeleteView(UserCommentAuthorMixin, WriteTransactionMixin,
+                        DeleteView):
     """Удаление комментариев"""
 
     model = Comment
     template_name = 'blog/comment.html'
 
 
-class ProfileUser(ListView):
+class ProfileUser(StaleOnErrorMixin, CountedPaginationMixin,
+                  FeedEntryListMixin, ListView):
     """Страница профиля пользователя"""
 
     model = get_user_model()
@@ -171,22 +196,40 @@ class ProfileUser(ListView):
 
     def get_queryset(self):
         user = self.get_user()
-        query_set = get_posts(
-            add_filter=self.request.user != user, add_comments=True)
-        return query_set.filter(author=user)
+        if self.request.user != user:
+            return feed.visible_entries(author=user)
+        return get_posts(add_comments=True).filter(author=user)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['profile'] = self.get_user()
+        context['following'] = (
+            self.request.user.is_authenticated
+            and Follow.objects.filter(
+                user=self.request.user, author=self.get_user()).exists())
         return context
 
+    def get_count_key(self):
+        user = self.get_user()
+        return counters.count_key(
+            author_id=user.pk, add_filter=self.request.user != user)
+
+    def get_count_filters(self):
+        user = self.get_user()
+        if self.request.user == user:
+            return None
+        return {'author': user}
+
     def get_user(self):
         """Получение объекта пользователя"""
-        return get_object_or_404(get_user_model(),
-                                 username=self.kwargs.get('username'))
+        if not hasattr(self, '_user'):
+            self._user = get_object_or_404(
+                get_user_model(), username=self.kwargs.get('username'))
+        return self._user
 
 
-class EditProfileView(LoginRequiredMixin, UpdateView):
+class EditProfileView(LoginRequiredMixin, WriteTransactionMixin,
+                      UpdateView):
     """Редактирование профиля пользователя"""
 
     model = get_user_model()
@@ -199,3 +242,36 @@ class EditProfileView(LoginRequiredMixin, UpdateView):
     def get_success_url(self):
         return reverse(
             'blog:profile', kwargs={'username': self.request.user.username})
+
+
+class FollowFeed(LoginRequiredMixin, FeedEntryListMixin, ListView):
+    """Лента постов авторов, на которых подписан пользователь"""
+
+    template_name = 'blog/follow.html'
+    paginate_by = COUNT_POSTS_ON_MAIN
+    paginator_class = counters.CountedPaginator
+
+    def get_feed_key(self):
+        return None
+
+    def get_queryset(self):
+        return timeline.timeline_entries(self.request.user)
+
+
+class FollowAuthorView(LoginRequiredMixin, View):
+    """Подписка на автора"""
+
+    def post(self, request, username):
+        author = get_object_or_404(get_user_model(), username=username)
+        if author != request.user:
+            timeline.follow(request.user, author)
+        return redirect('blog:profile', username=username)
+
+
+class UnfollowAuthorView(LoginRequiredMixin, View):
+    """Отписка от автора"""
+
+    def post(self, request, username):
+        author = get_object_or_404(get_user_model(), username=username)
+        timeline.unfollow(request.user, author)
+        return redirect('blog:profile', username=username)
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,6 +30,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'core.apps.CoreConfig',
     'blog.apps.BlogConfig',
     'pages.apps.PagesConfig',
     'django_bootstrap5',
@@ -42,6 +44,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.StackSamplingMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.RequestRecordingMiddleware',
+    'core.middleware.MemoryTracingMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.QueryDeadlineMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
@@ -70,11 +82,116 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+DATABASE_ENGINE = os.getenv('DATABASE_ENGINE', 'sqlite')
+
+if DATABASE_ENGINE == 'postgresql':
+    # POSTGRES_POOL=1 enables the psycopg connection pool (requires
+    # requirements-postgres.txt); Django needs CONN_MAX_AGE = 0 with it.
+    # Without the pool connections persist between requests.
+    POSTGRES_POOL = os.getenv('POSTGRES_POOL') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'blogicum'),
+            'USER': os.getenv('POSTGRES_USER', 'blogicum'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if POSTGRES_POOL else 600,
+            'CONN_HEALTH_CHECKS': True,
+            # QuerySet.iterator() streams through server-side cursors,
+            # which break behind pgbouncer in transaction pooling mode.
+            'DISABLE_SERVER_SIDE_CURSORS': (
+                os.getenv('POSTGRES_PGBOUNCER') == '1'),
+            'OPTIONS': {
+                'pool': {
+                    'min_size': 2,
+                    'max_size': int(os.getenv('POSTGRES_POOL_SIZE', 10)),
+                },
+            } if POSTGRES_POOL else {},
+        }
+    }
+    # Trigram lookups and the pg_trgm indexes used by the admin search.
+    INSTALLED_APPS.append('django.contrib.postgres')
+    replica_settings = [
+        {'HOST': host}
+        for host in os.getenv('POSTGRES_REPLICA_HOSTS', '').split(',')
+        if host
+    ]
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            # SQLITE_PATH points benchmarks at a separate seeded database.
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Write transactions take the write lock at BEGIN instead of
+                # failing with "database is locked" when they escalate.
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
     }
+    # SQLITE_REPLICAS=N adds N local copies of the database, refreshed
+    # with "manage.py refresh_replicas".
+    replica_settings = [
+        {'NAME': BASE_DIR / f'db.replica{number}.sqlite3'}
+        for number in range(1, int(os.getenv('SQLITE_REPLICAS', 0)) + 1)
+    ]
+
+# Read replicas: hosts from POSTGRES_REPLICA_HOSTS (comma-separated) or
+# SQLite copies.
+
+DATABASE_REPLICAS = [
+    f'replica{number}' for number in range(1, len(replica_settings) + 1)
+]
+
+for alias, overrides in zip(DATABASE_REPLICAS, replica_settings):
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        **overrides,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+REPLICA_READ_APPS = ['blog']
+
+REPLICA_STICKY_SECONDS = 30
+
+# Applied to every new SQLite connection by core.db.configure_sqlite.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+}
+
+
+# Cache
+# Bounded in-process LRU in front of a cache shared by all workers.
+# Point SHARED_CACHE_BACKEND / SHARED_CACHE_LOCATION at memcached or redis
+# in production; the file-based cache works on a single host.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TieredCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'MAX_SIZE': 32 * 1024 * 1024,
+            'LOCAL_TIMEOUT': 30,
+            'INVALIDATION_INTERVAL': 1,
+        },
+    },
+    'shared': {
+        'BACKEND': os.getenv('SHARED_CACHE_BACKEND', 'core.cache.FileCache'),
+        'LOCATION': os.getenv(
+            'SHARED_CACHE_LOCATION',
+            str(Path(tempfile.gettempdir()) / 'blogicum-cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10_000,
+        },
+    },
 }
 
 
@@ -128,6 +245,8 @@ LOGIN_URL = 'login'
 
 CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 
+QUERY_DEADLINE_VIEW = 'pages.views.service_unavailable'
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -137,3 +256,260 @@ AUTH_USER_MODEL = 'auth.User'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+
+# Feed counters
+
+POST_COUNT_CACHE_TIMEOUT = 60 * 10
+
+POST_COUNT_ESTIMATE = False
+
+POST_COUNT_ESTIMATE_THRESHOLD = 10_000
+
+# Following timelines
+
+TIMELINE_FANOUT_LIMIT = 10_000
+
+TIMELINE_BACKFILL = 50
+
+FEED_CACHE_TIMEOUT = 60
+
+# Serve the last good render of read pages when the database fails
+
+STALE_TIME_BUDGET = 2
+
+STALE_RENDER_TIMEOUT = 60 * 60 * 24
+
+# Default limit for database queries of one request, in milliseconds;
+# per-view limits are set with the query_deadline argument in urls.py.
+
+QUERY_DEADLINE_DEFAULT = 5000
+
+# Server-Timing header for pages of these apps; the listed includes get
+# their own metric.
+
+SERVER_TIMING_APPS = ['blog', 'pages']
+
+SERVER_TIMING_TEMPLATES = {
+    'includes/post_card.html': 'post_card',
+    'includes/comments.html': 'comments',
+}
+
+# Query count limits per URL name, checked by QueryBudgetMiddleware.
+# The same SQL shape repeated more than
+# QUERY_REPEAT_LIMIT times in one request is reported as an N+1.
+# Violations are logged; tests set QUERY_BUDGET_RAISE to fail on them.
+
+QUERY_BUDGETS = {
+    'blog:index': 8,
+    'blog:category_posts': 10,
+    'blog:profile': 10,
+    'blog:follow_feed': 8,
+    'blog:post_detail': 12,
+    'blog:create_post': 20,
+    'blog:edit_post': 20,
+    'blog:delete_post': 20,
+}
+
+QUERY_BUDGET_DEFAULT = 20
+
+QUERY_REPEAT_LIMIT = 5
+
+QUERY_BUDGET_RAISE = False
+
+# Queries slower than SLOW_QUERY_THRESHOLD milliseconds (None disables)
+# are written with their plan to SLOW_QUERY_LOG as JSON lines;
+# "manage.py slow_query_report" aggregates them by query shape.
+
+SLOW_QUERY_THRESHOLD = 100
+
+SLOW_QUERY_LOG = os.getenv(
+    'SLOW_QUERY_LOG',
+    str(Path(tempfile.gettempdir()) / 'blogicum-slow-queries.log'))
+
+SLOW_QUERY_LOG_BACKUPS = 5
+
+# cProfile captures: on average one request in PROFILE_SAMPLE_RATE
+# (0 disables sampling) and requests carrying PROFILE_HEADER signed by
+# "manage.py profile_report --token".
+
+PROFILE_SAMPLE_RATE = 0
+
+PROFILE_HEADER = 'X-Profile-Token'
+
+PROFILE_TOKEN_MAX_AGE = 60 * 60
+
+PROFILE_DIR = os.getenv(
+    'PROFILE_DIR', str(Path(tempfile.gettempdir()) / 'blogicum-profiles'))
+
+# Always-on stack sampling of request threads. SAMPLING_INTERVAL seconds
+# between samples (None disables); the interval doubles while sampling
+# takes more than SAMPLING_MAX_OVERHEAD of the process time. Collapsed
+# stacks go to SAMPLING_DIR/<pid>.collapsed for flamegraph.pl.
+
+SAMPLING_INTERVAL = float(os.getenv('SAMPLING_INTERVAL', 0)) or None
+
+SAMPLING_MAX_OVERHEAD = 0.02
+
+SAMPLING_FLUSH_INTERVAL = 60
+
+SAMPLING_DIR = os.getenv(
+    'SAMPLING_DIR', str(Path(tempfile.gettempdir()) / 'blogicum-stacks'))
+
+# Prometheus metrics at /metrics. Every process saves its metrics to
+# METRICS_DIR at most once per METRICS_FLUSH_INTERVAL seconds and the
+# endpoint sums all files; clear the directory when the server starts.
+# With METRICS_TOKEN set, scrapes must send "Authorization: Bearer".
+
+METRICS_DIR = os.getenv(
+    'METRICS_DIR', str(Path(tempfile.gettempdir()) / 'blogicum-metrics'))
+
+METRICS_FLUSH_INTERVAL = 1
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+METRICS_BUCKETS = {
+    'request_peak_memory_bytes': (
+        64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024,
+        16 * 1024 * 1024, 64 * 1024 * 1024),
+    'upload_size_bytes': (
+        10 * 1024, 100 * 1024, 512 * 1024, 1024 * 1024, 5 * 1024 * 1024,
+        10 * 1024 * 1024),
+}
+
+# Opt-in tracemalloc: peak allocation per request goes to the metrics,
+# line statistics are saved every MEMORY_SNAPSHOT_INTERVAL seconds and
+# compared by "manage.py memory_report" and the /admin/memory/ page.
+
+MEMORY_TRACING = os.getenv('MEMORY_TRACING') == '1'
+
+MEMORY_TRACE_FRAMES = 1
+
+MEMORY_SNAPSHOT_INTERVAL = 5 * 60
+
+MEMORY_SNAPSHOT_KEEP = 12
+
+MEMORY_SNAPSHOT_DIR = os.getenv(
+    'MEMORY_SNAPSHOT_DIR',
+    str(Path(tempfile.gettempdir()) / 'blogicum-memory'))
+
+# Sampled request capture for "manage.py load_test --replay": one request
+# in REQUEST_RECORDING_SAMPLE_RATE (0 disables) is written as a JSON line
+# to REQUEST_RECORDING_LOG from a background thread; records are dropped
+# when the queue is full. Routes whose namespace or name is listed in
+# REQUEST_RECORDING_SKIP are not recorded.
+
+REQUEST_RECORDING_SAMPLE_RATE = int(
+    os.getenv('REQUEST_RECORDING_SAMPLE_RATE', 0))
+
+REQUEST_RECORDING_LOG = os.getenv(
+    'REQUEST_RECORDING_LOG',
+    str(Path(tempfile.gettempdir()) / 'blogicum-requests.jsonl'))
+
+REQUEST_RECORDING_BACKUPS = 10
+
+REQUEST_RECORDING_SKIP = ['admin', 'metrics', 'memory_report']
+
+# Every log handler is a core.logs.AsyncHandler: request threads only put
+# the formatted record on a bounded queue, a background thread writes it
+# (files are flushed in batches), and records are dropped, counted in
+# log_records_dropped_total, when the queue is full. Application and
+# Django logs are JSON lines in APP_LOG and, with DEBUG, on stderr.
+
+APP_LOG = os.getenv(
+    'APP_LOG', str(Path(tempfile.gettempdir()) / 'blogicum.log'))
+
+APP_LOG_BACKUPS = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'require_debug_true': {
+            '()': 'django.utils.log.RequireDebugTrue',
+        },
+        'require_debug_false': {
+            '()': 'django.utils.log.RequireDebugFalse',
+        },
+    },
+    'formatters': {
+        'message': {'format': '%(message)s'},
+        'json': {'()': 'core.logs.JSONFormatter'},
+    },
+    'handlers': {
+        'console': {
+            '()': 'core.logs.AsyncHandler',
+            'target': 'logging.StreamHandler',
+            'filters': ['require_debug_true'],
+            'formatter': 'json',
+        },
+        'app': {
+            '()': 'core.logs.AsyncHandler',
+            'target': 'core.logs.BatchedRotatingFileHandler',
+            'filename': APP_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': APP_LOG_BACKUPS,
+            'delay': True,
+            'formatter': 'json',
+        },
+        'mail_admins': {
+            '()': 'core.logs.AsyncHandler',
+            'target': 'django.utils.log.AdminEmailHandler',
+            'level': 'ERROR',
+            'filters': ['require_debug_false'],
+        },
+        'slow_queries': {
+            '()': 'core.logs.AsyncHandler',
+            'target': 'core.logs.BatchedRotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': SLOW_QUERY_LOG_BACKUPS,
+            'delay': True,
+            'formatter': 'message',
+        },
+        'requests': {
+            '()': 'core.logs.AsyncHandler',
+            'target': 'core.logs.BatchedRotatingFileHandler',
+            'filename': REQUEST_RECORDING_LOG,
+            'maxBytes': 50 * 1024 * 1024,
+            'backupCount': REQUEST_RECORDING_BACKUPS,
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'root': {
+        'handlers': ['console', 'app'],
+        'level': 'WARNING',
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['console', 'app', 'mail_admins'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'django.server': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core': {
+            'handlers': ['console', 'app'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'blog': {
+            'handlers': ['console', 'app'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.slowlog': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'core.recording': {
+            'handlers': ['requests'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
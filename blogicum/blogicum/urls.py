@@ -4,6 +4,7 @@ from django.urls import include, path, reverse_lazy
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import memory_report, prometheus_metrics
 from .forms import CustomUserCreationForm
 
 handler404 = 'pages.views.page_not_found'
@@ -12,7 +13,9 @@ handler500 = 'pages.views.internal_server_error'
 urlpatterns = [
     path('', include('blog.urls')),
     path('pages/', include('pages.urls')),
+    path('admin/memory/', memory_report, name='memory_report'),
     path('admin/', admin.site.urls),
+    path('metrics', prometheus_metrics, name='metrics'),
     path('auth/', include('django.contrib.auth.urls')),
     path('auth/registration/', CreateView.as_view(
         template_name='registration/registration_form.html',
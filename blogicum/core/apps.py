@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.template.base import Template
+
+        from . import metrics
+        from .cache import collect_stats
+        from .db import configure_sqlite
+        from .timing import timed_render
+
+        connection_created.connect(
+            configure_sqlite, dispatch_uid='core.configure_sqlite')
+        # Включения шаблонов рендерятся через Template.render, поэтому
+        # время post_card.html и comments.html видно только здесь.
+        Template.render = timed_render
+        metrics.register(collect_stats)
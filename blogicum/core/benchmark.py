@@ -0,0 +1,47 @@
+import math
+
+
+def percentile(values, q):
+    """Перцентиль q (0–100) по методу ближайшего ранга"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(latencies, duration, errors=0):
+    """Пропускная способность и задержки в миллисекундах"""
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / duration, 1) if duration else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def compare(results, baseline, tolerance, min_delta_ms=5):
+    """
+    Ухудшения результатов относительно базовой линии: задержки и память
+    больше чем на tolerance, пропускная способность меньше, запросов
+    к базе больше. Рост задержки меньше min_delta_ms считается шумом.
+    """
+    regressions = []
+    for route, current in results.items():
+        base = baseline.get(route)
+        if base is None:
+            continue
+        for metric in ('p50_ms', 'p99_ms', 'peak_kib'):
+            slack = min_delta_ms if metric.endswith('_ms') else 0
+            if current[metric] > base[metric] * (1 + tolerance) + slack:
+                regressions.append(
+                    f'{route}: {metric} {base[metric]} -> {current[metric]}')
+        if current['rps'] * (1 + tolerance) < base['rps']:
+            regressions.append(
+                f'{route}: rps {base["rps"]} -> {current["rps"]}')
+        if current['queries'] > base['queries']:
+            regressions.append(
+                f'{route}: queries {base["queries"]} -> {current["queries"]}')
+    return regressions
@@ -0,0 +1,317 @@
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+
+from .timing import timed
+
+SEQ_KEY = 'tiered:invalidation:seq'
+LOG_KEY = 'tiered:invalidation:{}'
+CLEAR_ALL = '*'
+MAX_LOG_GAP = 1000
+
+# Локальные кэши общие для всех потоков процесса, как у LocMemCache.
+_local_caches = {}
+_boot_id = uuid.uuid4().hex
+
+
+def _origin():
+    """Идентификатор процесса-источника записи в журнале инвалидации"""
+    return f'{os.getpid()}:{_boot_id}'
+
+
+def collect_stats():
+    """Счётчики локальных кэшей процесса для core.metrics"""
+    return {
+        ('cache_operations_total', (('cache', location), ('result', name))):
+            value
+        for location, local in _local_caches.items()
+        for name, value in local.stats.items()
+    }
+
+
+class FileCache(FileBasedCache):
+    """
+    Файловый кэш, который проверяет переполнение не чаще раза
+    в CULL_INTERVAL секунд: FileBasedCache перечисляет все файлы
+    каталога при каждой записи.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._cull_interval = params.get('OPTIONS', {}).get(
+            'CULL_INTERVAL', 10)
+        self._culled_at = 0
+
+    def _cull(self):
+        now = time.monotonic()
+        if now - self._culled_at < self._cull_interval:
+            return
+        self._culled_at = now
+        super()._cull()
+
+
+class LocalLRU:
+    """Ограниченный по размеру в байтах LRU-кэш процесса с TTL"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.seen_seq = None
+        self.polled_at = 0
+        self.stats = {
+            'local_hits': 0, 'local_misses': 0,
+            'shared_hits': 0, 'shared_misses': 0,
+            'local_evictions': 0, 'invalidations': 0,
+        }
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is not None and item[0] <= time.monotonic():
+                self._pop(key)
+                item = None
+            if item is None:
+                self.stats['local_misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats['local_hits'] += 1
+            return item[1]
+
+    def set(self, key, pickled, ttl):
+        if len(pickled) > self.max_size or ttl <= 0:
+            self.delete(key)
+            return
+        with self.lock:
+            self._pop(key)
+            self.entries[key] = (time.monotonic() + ttl, pickled)
+            self.size += len(pickled)
+            while self.size > self.max_size:
+                self._pop(next(iter(self.entries)))
+                self.stats['local_evictions'] += 1
+
+    def delete(self, key):
+        with self.lock:
+            self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        item = self.entries.pop(key, None)
+        if item is not None:
+            self.size -= len(item[1])
+
+
+class TieredCache(BaseCache):
+    """
+    Двухуровневый кэш: LRU в памяти процесса перед общим кэшем.
+
+    LOCATION — алиас общего кэша в CACHES. Записи через этот бэкенд
+    публикуются в журнал инвалидации в общем кэше; остальные процессы
+    просматривают его не чаще раза в INVALIDATION_INTERVAL секунд
+    и удаляют изменённые ключи из своего LRU. Если в журнале есть
+    пропуски, локальный кэш очищается целиком. На бэкендах без
+    атомарного incr (файловый кэш) запись журнала может потеряться,
+    тогда устаревшее значение живёт в LRU не дольше LOCAL_TIMEOUT.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 30)
+        self._poll_interval = options.get('INVALIDATION_INTERVAL', 1)
+        self._log_timeout = options.get('INVALIDATION_LOG_TIMEOUT', 300)
+        self._local = _local_caches.setdefault(
+            location, LocalLRU(options.get('MAX_SIZE', 16 * 1024 * 1024)))
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def get_stats(self):
+        """Счётчики попаданий и промахов по уровням кэша"""
+        return dict(self._local.stats)
+
+    def _local_ttl(self, timeout):
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self._local_timeout
+        return min(timeout, self._local_timeout)
+
+    def _publish(self, keys):
+        try:
+            seq = self.shared.incr(SEQ_KEY)
+        except ValueError:
+            # Журнал начинается с текущего времени в микросекундах, чтобы
+            # после очистки общего кэша номера не повторяли уже виденные.
+            self.shared.add(SEQ_KEY, time.time_ns() // 1000, None)
+            seq = self.shared.incr(SEQ_KEY)
+        self.shared.set(
+            LOG_KEY.format(seq), (_origin(), keys), self._log_timeout)
+
+    def _poll(self):
+        """Удаляет из LRU ключи, изменённые другими процессами"""
+        local = self._local
+        now = time.monotonic()
+        if now - local.polled_at < self._poll_interval:
+            return
+        local.polled_at = now
+        seq = self.shared.get(SEQ_KEY, 0)
+        seen = local.seen_seq
+        local.seen_seq = seq
+        if seen is None or seq == seen:
+            return
+        if not 0 < seq - seen <= MAX_LOG_GAP:
+            local.clear()
+            return
+        log_keys = [LOG_KEY.format(n) for n in range(seen + 1, seq + 1)]
+        records = self.shared.get_many(log_keys)
+        if len(records) < len(log_keys):
+            local.clear()
+            return
+        origin = _origin()
+        for record_origin, keys in records.values():
+            if record_origin == origin:
+                continue
+            if CLEAR_ALL in keys:
+                local.clear()
+                return
+            for key in keys:
+                local.delete(key)
+                local.stats['invalidations'] += 1
+
+    def _get_shared(self, key, default):
+        value = self.shared.get(key, self)
+        if value is self:
+            self._local.stats['shared_misses'] += 1
+            return default, False
+        self._local.stats['shared_hits'] += 1
+        return value, True
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        if not self.shared.add(key, value, self._shared_timeout(timeout)):
+            return False
+        self._local.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                        self._local_ttl(timeout))
+        self._publish([key])
+        return True
+
+    def get(self, key, default=None, version=None):
+        with timed('cache'):
+            return self._get(key, default, version)
+
+    def _get(self, key, default, version):
+        key = self.make_and_validate_key(key, version=version)
+        self._poll()
+        pickled = self._local.get(key)
+        if pickled is not None:
+            return pickle.loads(pickled)
+        value, found = self._get_shared(key, default)
+        if found:
+            self._local.set(
+                key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                self._local_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        with timed('cache'):
+            return self._get_many(keys, version)
+
+    def _get_many(self, keys, version):
+        self._poll()
+        made_keys = {
+            self.make_and_validate_key(key, version=version): key
+            for key in keys}
+        result = {}
+        missing = []
+        for made_key, key in made_keys.items():
+            pickled = self._local.get(made_key)
+            if pickled is None:
+                missing.append(made_key)
+            else:
+                result[key] = pickle.loads(pickled)
+        if missing:
+            found = self.shared.get_many(missing)
+            self._local.stats['shared_hits'] += len(found)
+            self._local.stats['shared_misses'] += len(missing) - len(found)
+            for made_key, value in found.items():
+                self._local.set(
+                    made_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                    self._local_timeout)
+                result[made_keys[made_key]] = value
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self.shared.set(key, value, self._shared_timeout(timeout))
+        self._local.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                        self._local_ttl(timeout))
+        self._publish([key])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        made = {
+            self.make_and_validate_key(key, version=version): value
+            for key, value in data.items()}
+        self.shared.set_many(made, self._shared_timeout(timeout))
+        for key, value in made.items():
+            self._local.set(
+                key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                self._local_ttl(timeout))
+        if made:
+            self._publish(list(made))
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.shared.touch(key, self._shared_timeout(timeout))
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._local.delete(key)
+        value = self.shared.incr(key, delta)
+        self._publish([key])
+        return value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._local.delete(key)
+        deleted = self.shared.delete(key)
+        self._publish([key])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version)
+                for key in keys]
+        for key in keys:
+            self._local.delete(key)
+        self.shared.delete_many(keys)
+        if keys:
+            self._publish(keys)
+
+    def has_key(self, key, version=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        self._poll()
+        return (self._local.get(made_key) is not None
+                or self.shared.has_key(made_key))
+
+    def clear(self):
+        self._local.clear()
+        self.shared.clear()
+        self._publish([CLEAR_ALL])
+
+    def _shared_timeout(self, timeout):
+        return self.default_timeout if timeout == DEFAULT_TIMEOUT else timeout
@@ -0,0 +1,128 @@
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, connections
+
+SQLITE_PROGRESS_STEPS = 1000
+
+
+class QueryBudgetExceeded(DatabaseError):
+    """Запросы к базе заняли больше отведённого времени"""
+
+
+class QueryDeadlineExceeded(DatabaseError):
+    """Запрос прерван базой: истёк срок, отведённый запросу страницы"""
+
+
+@contextmanager
+def query_time_budget(seconds):
+    """
+    Ограничивает суммарное время запросов к базе внутри блока.
+
+    Проверка выполняется до и после каждого запроса, поэтому
+    один долгий запрос не прерывается, но следующий уже не начнётся.
+    """
+    started = time.monotonic()
+
+    def check():
+        elapsed = time.monotonic() - started
+        if elapsed > seconds:
+            raise QueryBudgetExceeded(
+                f'Запросы заняли {elapsed:.2f} с при лимите {seconds} с')
+
+    def wrapper(execute, sql, params, many, context):
+        check()
+        result = execute(sql, params, many, context)
+        check()
+        return result
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield
+
+
+def _set_deadline(connection, remaining, deadline):
+    """Включает прерывание запросов на стороне базы"""
+    raw = connection.connection
+    if connection.vendor == 'sqlite':
+        raw.set_progress_handler(
+            lambda: time.monotonic() > deadline, SQLITE_PROGRESS_STEPS)
+        return
+    statements = {
+        'postgresql': 'SET statement_timeout = {}',
+        'mysql': 'SET SESSION max_execution_time = {}',
+    }
+    if connection.vendor in statements:
+        with raw.cursor() as cursor:
+            cursor.execute(statements[connection.vendor].format(
+                max(int(remaining * 1000), 1)))
+
+
+def _reset_deadline(connection):
+    raw = connection.connection
+    if raw is None:
+        return
+    try:
+        if connection.vendor == 'sqlite':
+            raw.set_progress_handler(None, 0)
+        elif connection.vendor == 'postgresql':
+            with raw.cursor() as cursor:
+                cursor.execute('RESET statement_timeout')
+        elif connection.vendor == 'mysql':
+            with raw.cursor() as cursor:
+                cursor.execute('SET SESSION max_execution_time = DEFAULT')
+    except DatabaseError:
+        # Соединение в прерванной транзакции: закрываем его в конце запроса.
+        connection.close_at = 0
+
+
+@contextmanager
+def query_deadline(milliseconds):
+    """
+    Срок на все запросы к базе внутри блока.
+
+    На SQLite запрос прерывает progress handler, на PostgreSQL и MySQL —
+    таймаут запроса на стороне сервера, выставляемый перед первым
+    запросом к соединению. Новый запрос после истечения срока
+    не начинается. Во всех случаях поднимается QueryDeadlineExceeded.
+    """
+    deadline = time.monotonic() + milliseconds / 1000
+    prepared = {}
+
+    def wrapper(execute, sql, params, many, context):
+        connection = context['connection']
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise QueryDeadlineExceeded(
+                f'Срок {milliseconds} мс на запросы страницы истёк')
+        if connection.alias not in prepared:
+            _set_deadline(connection, remaining, deadline)
+            prepared[connection.alias] = connection
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as error:
+            if time.monotonic() >= deadline:
+                raise QueryDeadlineExceeded(
+                    f'Запрос прерван: срок {milliseconds} мс истёк'
+                ) from error
+            raise
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        try:
+            yield
+        finally:
+            for connection in prepared.values():
+                _reset_deadline(connection)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению с SQLite"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
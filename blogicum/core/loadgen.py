@@ -0,0 +1,205 @@
+import gzip
+import itertools
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.cookiejar import CookieJar
+from socketserver import ThreadingMixIn
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import (HTTPCookieProcessor, HTTPRedirectHandler,
+                            Request, build_opener)
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from .benchmark import summarize
+
+HTTP_TIMEOUT = 30
+
+
+def read_records(path):
+    """
+    Записи запросов из JSON Lines (можно .gz): method, url_name, kwargs,
+    query и authenticated, как их пишет RequestRecordingMiddleware
+    """
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as lines:
+        return [json.loads(line) for line in lines if line.strip()]
+
+
+class ClientSession:
+    """Сессия тестового клиента: приложение вызывается в том же процессе"""
+
+    def __init__(self):
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0],
+                             raise_request_exception=False)
+
+    def request(self, method, url, data=None):
+        response = self.client.generic(
+            method, url, urlencode(data or {}),
+            'application/x-www-form-urlencoded')
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        return response.status_code, size
+
+
+class NoRedirect(HTTPRedirectHandler):
+    """Редиректы не выполняются, как у тестового клиента"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HTTPSession:
+    """Сессия с cookies и CSRF-токеном к запущенному серверу"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = CookieJar()
+        self.opener = build_opener(
+            HTTPCookieProcessor(self.cookies), NoRedirect)
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == settings.CSRF_COOKIE_NAME:
+                return cookie.value
+        # Форма входа выдаёт токен любому посетителю.
+        self.request('GET', reverse(settings.LOGIN_URL))
+        return next((cookie.value for cookie in self.cookies
+                     if cookie.name == settings.CSRF_COOKIE_NAME), '')
+
+    def request(self, method, url, data=None):
+        body = None
+        if method != 'GET':
+            body = urlencode(
+                {**(data or {}), 'csrfmiddlewaretoken': self.csrf_token()}
+            ).encode()
+        request = Request(self.base_url + url, data=body, method=method)
+        try:
+            with self.opener.open(request, timeout=HTTP_TIMEOUT) as response:
+                return response.status, len(response.read())
+        except HTTPError as error:
+            return error.code, len(error.read())
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+@contextmanager
+def wsgi_server(application):
+    """Многопоточный wsgiref-сервер на свободном порту 127.0.0.1"""
+    server = make_server('127.0.0.1', 0, application,
+                         server_class=ThreadingServer,
+                         handler_class=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def new_route():
+    return {'latencies': [], 'errors': 0, 'bytes': 0}
+
+
+class LoadGenerator:
+    """
+    Нагрузка из concurrency потоков: каждый выбирает случайные записи
+    из records, пока не отправлено requests запросов или не прошло
+    duration секунд.
+
+    make_session(authenticated) создаёт сессию, prepare(record)
+    возвращает метод, адрес и данные формы. Вход (url_name 'login')
+    выполняется в новой анонимной сессии.
+    """
+
+    def __init__(self, records, make_session, prepare, concurrency=4,
+                 requests=None, duration=None, random_seed=None):
+        self.records = records
+        self.make_session = make_session
+        self.prepare = prepare
+        self.concurrency = concurrency
+        self.requests = requests
+        self.duration = duration
+        self.random_seed = random_seed
+        self.results = []
+
+    def run(self):
+        """Статистика по маршрутам и итоговая под ключом 'total'"""
+        self.sent = itertools.count()
+        self.stop_at = (time.monotonic() + self.duration
+                        if self.duration else None)
+        started = time.perf_counter()
+        threads = [threading.Thread(target=self.worker, args=(number,))
+                   for number in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.stats(time.perf_counter() - started)
+
+    def running(self):
+        if self.stop_at is not None and time.monotonic() >= self.stop_at:
+            return False
+        return self.requests is None or next(self.sent) < self.requests
+
+    def worker(self, number):
+        rng = random.Random(
+            None if self.random_seed is None else self.random_seed + number)
+        sessions = {}
+        routes = {}
+        try:
+            while self.running():
+                record = rng.choice(self.records)
+                authenticated = bool(record.get('authenticated'))
+                if record['url_name'] == 'login':
+                    session = self.make_session(False)
+                elif authenticated in sessions:
+                    session = sessions[authenticated]
+                else:
+                    session = sessions[authenticated] = self.make_session(
+                        authenticated)
+                method, url, data = self.prepare(record)
+                started = time.perf_counter()
+                status, size = session.request(method, url, data)
+                route = routes.setdefault(record['url_name'], new_route())
+                route['latencies'].append(time.perf_counter() - started)
+                route['errors'] += status >= 400
+                route['bytes'] += size
+        finally:
+            self.results.append(routes)
+            connection.close()
+
+    def stats(self, elapsed):
+        merged = {}
+        total = new_route()
+        for routes in self.results:
+            for name, route in routes.items():
+                for target in (merged.setdefault(name, new_route()), total):
+                    target['latencies'].extend(route['latencies'])
+                    target['errors'] += route['errors']
+                    target['bytes'] += route['bytes']
+        merged = dict(sorted(merged.items()), total=total)
+        stats = {}
+        for name, route in merged.items():
+            stats[name] = summarize(
+                route['latencies'], elapsed, route['errors'])
+            stats[name]['kib'] = round(
+                route['bytes'] / max(len(route['latencies']), 1) / 1024, 1)
+        return stats
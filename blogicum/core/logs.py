@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+QUEUE_SIZE = 10000
+# Файлы сбрасываются на диск, когда очередь опустела или накопилось
+# столько записей.
+BATCH_SIZE = 500
+
+
+class JSONFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(
+                record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        # django.request и django.server передают запрос и статус в extra.
+        path = getattr(getattr(record, 'request', None), 'path', None)
+        if path is not None:
+            entry['path'] = path
+        if hasattr(record, 'status_code'):
+            entry['status'] = record.status_code
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BatchedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler без сброса файла после каждой записи: пачку
+    сбрасывает фоновый поток AsyncHandler
+    """
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class Listener(QueueListener):
+    """
+    Поток записи: сбрасывает файлы пачками и при остановке ждёт места
+    в очереди, чтобы дописать все записи
+    """
+
+    pending = 0
+
+    def dequeue(self, block):
+        if self.pending >= BATCH_SIZE:
+            self.flush()
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            self.flush()
+            return self.queue.get(block)
+
+    def handle(self, record):
+        super().handle(record)
+        self.pending += 1
+
+    def flush(self):
+        if not self.pending:
+            return
+        self.pending = 0
+        for handler in self.handlers:
+            getattr(handler, 'flush_batch', handler.flush)()
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class AsyncHandler(QueueHandler):
+    """
+    Обработчик, который не блокирует поток запроса.
+
+    Запись форматируется сразу и кладётся в ограниченную очередь,
+    целевой обработчик target (путь к классу, остальные параметры
+    передаются ему) пишет её в фоновом потоке. Если очередь заполнена,
+    запись отбрасывается и учитывается в log_records_dropped_total.
+    """
+
+    def __init__(self, target, queue_size=QUEUE_SIZE, **kwargs):
+        super().__init__(queue.Queue(queue_size))
+        self.target = import_string(target)(**kwargs)
+        self.running = False
+        self.start()
+        # После fork поток записи остаётся только в родителе.
+        os.register_at_fork(after_in_child=self.restart)
+
+    def start(self):
+        self.listener = Listener(
+            self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+        self.running = True
+
+    def restart(self):
+        if self.running:
+            self.queue = queue.Queue(self.queue.maxsize)
+            self.start()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc('log_records_dropped_total', logger=record.name)
+
+    def close(self):
+        if self.running:
+            self.running = False
+            self.listener.stop()
+            self.target.close()
+        super().close()
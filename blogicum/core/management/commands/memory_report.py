@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core import memory
+
+
+class Command(BaseCommand):
+    help = ('Места выделения памяти, растущие между снимками tracemalloc, '
+            'по процессам')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pid', help='Только снимки этого процесса')
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options['pid']:
+            report = {options['pid']: memory.growing_sites(
+                memory.list_snapshots(options['pid']), options['limit'])}
+        else:
+            report = memory.report(options['limit'])
+        if not report:
+            self.stdout.write('Снимков нет: включите MEMORY_TRACING')
+        for pid, sites in report.items():
+            self.stdout.write(f'Процесс {pid}:')
+            for site in sites:
+                self.stdout.write(
+                    f'  +{site["growth"] / 1024:.1f} KiB '
+                    f'({site["size"] / 1024:.1f} KiB) {site["site"]}')
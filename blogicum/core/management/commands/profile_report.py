@@ -0,0 +1,36 @@
+import pstats
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = ('Сводка по профилям запросов из PROFILE_DIR: функции '
+            'с наибольшим накопленным временем')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view', help='Только профили маршрута, например blog:index')
+        parser.add_argument('--limit', type=int, default=30)
+        parser.add_argument(
+            '--token', action='store_true',
+            help='Вывести значение заголовка для профилирования запроса')
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(
+                f'{settings.PROFILE_HEADER}: {profiling.make_token()}')
+            return
+        pattern = '*.prof'
+        if options['view']:
+            pattern = f'{options["view"].replace(":", "-")}.*.prof'
+        paths = sorted(Path(settings.PROFILE_DIR).glob(pattern))
+        if not paths:
+            raise CommandError('Профилей не найдено')
+        stats = pstats.Stats(*map(str, paths), stream=self.stdout)
+        self.stdout.write(f'Профилей: {len(paths)}')
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(
+            options['limit'])
@@ -0,0 +1,41 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики из DATABASE_REPLICAS '
+            'через backup API')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять копирование каждые N секунд')
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        if 'sqlite3' not in primary['ENGINE']:
+            raise CommandError('Команда работает только с SQLite')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены, задайте SQLITE_REPLICAS')
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                self.refresh(primary['NAME'],
+                             settings.DATABASES[alias]['NAME'])
+                self.stdout.write(f'Реплика {alias} обновлена')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def refresh(self, source_name, target_name):
+        source = sqlite3.connect(source_name)
+        target = sqlite3.connect(target_name)
+        try:
+            # Копирование идёт в одной транзакции чтения, запись в основную
+            # базу в режиме WAL при этом не блокируется.
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.queries import normalize
+
+
+class Command(BaseCommand):
+    help = ('Сводка медленных запросов из SLOW_QUERY_LOG и его архивов '
+            'по формам запросов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--output', help='Записать сводку в файл JSON')
+
+    def handle(self, *args, **options):
+        shapes = {}
+        for record in self.read_log():
+            shape = normalize(record['sql'])
+            stats = shapes.setdefault(shape, {
+                'shape': shape, 'count': 0, 'total_ms': 0, 'max_ms': 0,
+                'views': set(), 'sql': record['sql'],
+                'params': record['params'], 'explain': record['explain'],
+            })
+            stats['count'] += 1
+            stats['total_ms'] += record['duration_ms']
+            stats['views'].add(record['view'])
+            if record['duration_ms'] > stats['max_ms']:
+                stats['max_ms'] = record['duration_ms']
+                stats.update(sql=record['sql'], params=record['params'],
+                             explain=record['explain'])
+        report = sorted(shapes.values(), key=lambda stats: stats['total_ms'],
+                        reverse=True)[:options['limit']]
+        for stats in report:
+            stats['views'] = sorted(stats['views'])
+            stats['total_ms'] = round(stats['total_ms'], 2)
+            self.stdout.write(
+                f'{stats["total_ms"]:>10} ms {stats["count"]:>6}x '
+                f'max {stats["max_ms"]} ms  {", ".join(stats["views"])}\n'
+                f'  {stats["shape"]}\n  {stats["explain"]}')
+        if options['output']:
+            Path(options['output']).write_text(
+                json.dumps(report, ensure_ascii=False, indent=2))
+
+    def read_log(self):
+        base = Path(settings.SLOW_QUERY_LOG)
+        paths = [base.with_name(f'{base.name}.{number}')
+                 for number in range(settings.SLOW_QUERY_LOG_BACKUPS, 0, -1)]
+        for path in [*paths, base]:
+            if not path.exists():
+                continue
+            with path.open(encoding='utf-8') as log:
+                for line in log:
+                    if line.strip():
+                        yield json.loads(line)
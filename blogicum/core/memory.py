@@ -0,0 +1,101 @@
+import os
+import pickle
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+_snapshot_at = 0
+
+
+def start():
+    """Включает tracemalloc, если он ещё не запущен"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(settings.MEMORY_TRACE_FRAMES)
+
+
+def begin_request():
+    """
+    Сбрасывает пик перед запросом. Пик общий для процесса, поэтому
+    при нескольких потоках он относится ко всем одновременным запросам.
+    """
+    tracemalloc.reset_peak()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def end_request(started_with):
+    """Пик памяти, выделенной с начала запроса, в байтах"""
+    return max(tracemalloc.get_traced_memory()[1] - started_with, 0)
+
+
+def snapshot_directory():
+    return Path(settings.MEMORY_SNAPSHOT_DIR)
+
+
+def maybe_take_snapshot():
+    """Снимок раз в MEMORY_SNAPSHOT_INTERVAL секунд"""
+    global _snapshot_at
+    if time.monotonic() - _snapshot_at < settings.MEMORY_SNAPSHOT_INTERVAL:
+        return None
+    _snapshot_at = time.monotonic()
+    return take_snapshot()
+
+
+def take_snapshot():
+    """
+    Сохраняет статистику по строкам кода в MEMORY_SNAPSHOT_DIR,
+    храня последние MEMORY_SNAPSHOT_KEEP снимков процесса
+    """
+    snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+    sizes = {
+        str(stat.traceback[0]): stat.size
+        for stat in snapshot.statistics('lineno')
+    }
+    directory = snapshot_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    pid = os.getpid()
+    path = directory / f'{pid}.{time.time_ns()}.snapshot'
+    path.write_bytes(pickle.dumps(sizes))
+    for old in list_snapshots(pid)[:-settings.MEMORY_SNAPSHOT_KEEP]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+def list_snapshots(pid=None):
+    """Файлы снимков процесса или всех процессов по времени"""
+    pattern = f'{pid}.*.snapshot' if pid else '*.snapshot'
+    return sorted(snapshot_directory().glob(pattern),
+                  key=lambda path: int(path.name.split('.')[1]))
+
+
+def growing_sites(paths, limit=20):
+    """
+    Места выделения памяти, которые росли от снимка к снимку
+    (или хотя бы не уменьшались), по убыванию общего роста
+    """
+    snapshots = [pickle.loads(path.read_bytes()) for path in paths]
+    if len(snapshots) < 2:
+        return []
+    sites = []
+    for site in snapshots[-1]:
+        sizes = [snapshot.get(site, 0) for snapshot in snapshots]
+        growth = sizes[-1] - sizes[0]
+        if growth > 0 and all(a <= b for a, b in zip(sizes, sizes[1:])):
+            sites.append({'site': site, 'growth': growth,
+                          'size': sizes[-1], 'sizes': sizes})
+    sites.sort(key=lambda site: site['growth'], reverse=True)
+    return sites[:limit]
+
+
+def report(limit=20):
+    """Растущие места выделения по каждому процессу"""
+    pids = sorted({path.name.split('.')[0] for path in list_snapshots()})
+    return {pid: growing_sites(list_snapshots(pid), limit) for pid in pids}
@@ -0,0 +1,150 @@
+import os
+import pickle
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_lock = threading.Lock()
+_counters = Counter()
+_histograms = {}
+_collectors = []
+_flushed_at = 0
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Увеличивает счётчик метрики с метками"""
+    with _lock:
+        _counters[_key(name, labels)] += value
+    _maybe_flush()
+
+
+def observe(name, value, **labels):
+    """Добавляет значение в гистограмму с границами из METRICS_BUCKETS"""
+    buckets = settings.METRICS_BUCKETS.get(name, DEFAULT_BUCKETS)
+    with _lock:
+        histogram = _histograms.setdefault(_key(name, labels), {
+            'buckets': buckets, 'counts': [0] * (len(buckets) + 1),
+            'sum': 0,
+        })
+        histogram['counts'][bisect_left(histogram['buckets'], value)] += 1
+        histogram['sum'] += value
+    _maybe_flush()
+
+
+def register(collector):
+    """
+    Функция, возвращающая накопленные процессом счётчики
+    {(имя, метки): значение}; вызывается при сохранении метрик
+    """
+    _collectors.append(collector)
+
+
+def get_counters():
+    with _lock:
+        return dict(_counters)
+
+
+def _path(pid):
+    return Path(settings.METRICS_DIR) / f'{pid}.pickle'
+
+
+def _maybe_flush():
+    if time.monotonic() - _flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+def flush():
+    """
+    Сохраняет метрики процесса в METRICS_DIR/<pid>.pickle,
+    откуда их читают все процессы при отдаче /metrics
+    """
+    global _flushed_at
+    counters = Counter()
+    for collector in _collectors:
+        counters.update(collector())
+    with _lock:
+        _flushed_at = time.monotonic()
+        counters.update(_counters)
+        data = pickle.dumps({
+            'counters': counters,
+            'histograms': {key: {**histogram,
+                                 'counts': list(histogram['counts'])}
+                           for key, histogram in _histograms.items()},
+        })
+    path = _path(os.getpid())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(f'.{threading.get_ident()}.tmp')
+    temporary.write_bytes(data)
+    temporary.replace(path)
+
+
+def collect():
+    """Метрики всех процессов, сложенные вместе"""
+    flush()
+    counters = Counter()
+    histograms = {}
+    for path in Path(settings.METRICS_DIR).glob('*.pickle'):
+        try:
+            data = pickle.loads(path.read_bytes())
+        except (OSError, EOFError, pickle.UnpicklingError):
+            continue
+        counters.update(data['counters'])
+        for key, histogram in data['histograms'].items():
+            total = histograms.setdefault(key, {
+                'buckets': histogram['buckets'],
+                'counts': [0] * len(histogram['counts']), 'sum': 0})
+            if total['buckets'] != histogram['buckets']:
+                continue
+            total['counts'] = [
+                a + b for a, b in zip(total['counts'], histogram['counts'])]
+            total['sum'] += histogram['sum']
+    return counters, histograms
+
+
+def _format_labels(labels, **extra):
+    labels = [*labels, *extra.items()]
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"')
+         .replace('\n', r'\n'))
+        for name, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def render():
+    """Метрики в текстовом формате Prometheus"""
+    counters, histograms = collect()
+    by_name = defaultdict(list)
+    for (name, labels), value in sorted(counters.items()):
+        by_name[name].append(f'{name}{_format_labels(labels)} {value}')
+    lines = []
+    for name, samples in by_name.items():
+        lines.append(f'# TYPE {name} counter')
+        lines.extend(samples)
+    current = None
+    for (name, labels), histogram in sorted(histograms.items()):
+        if name != current:
+            lines.append(f'# TYPE {name} histogram')
+            current = name
+        cumulative = 0
+        bounds = [*histogram['buckets'], '+Inf']
+        for bound, count in zip(bounds, histogram['counts']):
+            cumulative += count
+            lines.append(
+                f'{name}_bucket{_format_labels(labels, le=bound)} '
+                f'{cumulative}')
+        lines.append(f'{name}_sum{_format_labels(labels)} '
+                     f'{histogram["sum"]}')
+        lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,322 @@
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from . import memory, metrics, profiling
+from .sampler import get_sampler
+from .db import QueryDeadlineExceeded, query_deadline
+from .queries import record_queries
+from .slowlog import slow_query_log
+from .timing import collect
+from .routers import replica_reads
+
+PRIMARY_COOKIE = 'read_primary'
+
+logger = logging.getLogger(__name__)
+recording_logger = logging.getLogger('core.recording')
+
+
+class QueryBudgetViolation(Exception):
+    """Страница выполнила больше запросов, чем ей отведено"""
+
+
+class QueryDeadlineMiddleware:
+    """
+    Ограничивает время запросов к базе для страницы.
+
+    Срок в миллисекундах задаётся в urls.py дополнительным аргументом
+    маршрута query_deadline, по умолчанию — QUERY_DEADLINE_DEFAULT.
+    Срок действует и на отрисовку шаблона. Если он истёк, ответ
+    формирует QUERY_DEADLINE_VIEW со статусом 503.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with ExitStack() as stack:
+            request.query_deadline_stack = stack
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        deadline = view_kwargs.pop(
+            'query_deadline', settings.QUERY_DEADLINE_DEFAULT)
+        if deadline:
+            request.query_deadline_stack.enter_context(
+                query_deadline(deadline))
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, QueryDeadlineExceeded):
+            return import_string(settings.QUERY_DEADLINE_VIEW)(
+                request, exception)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Отправляет чтение GET-запросов к страницам приложений из
+    REPLICA_READ_APPS на реплики.
+
+    После изменяющего запроса к представлению с атрибутом
+    read_your_writes браузер ещё REPLICA_STICKY_SECONDS секунд читает
+    с основной базы, чтобы автор сразу видел свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with ExitStack() as stack:
+            request.replica_stack = stack
+            response = self.get_response(request)
+        pin_primary = getattr(request, 'pin_primary', False)
+        if pin_primary and response.status_code < 400:
+            response.set_signed_cookie(
+                PRIMARY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if request.method not in ('GET', 'HEAD'):
+            request.pin_primary = getattr(
+                view_class, 'read_your_writes', False)
+            return
+        sticky = request.get_signed_cookie(
+            PRIMARY_COOKIE, default=None,
+            max_age=settings.REPLICA_STICKY_SECONDS)
+        if (not sticky and request.resolver_match.app_name
+                in settings.REPLICA_READ_APPS):
+            request.replica_stack.enter_context(replica_reads())
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает запросы к базе на каждую страницу.
+
+    Лимит берётся из QUERY_BUDGETS по имени маршрута (например,
+    'blog:index'), иначе — QUERY_BUDGET_DEFAULT. Запросы одной формы,
+    повторённые больше QUERY_REPEAT_LIMIT раз, считаются N+1.
+    Нарушения пишутся в лог, а при QUERY_BUDGET_RAISE поднимают
+    QueryBudgetViolation.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries() as log:
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match is not None:
+            self.check(match.view_name, log)
+        return response
+
+    def check(self, view_name, log):
+        problems = []
+        budget = settings.QUERY_BUDGETS.get(
+            view_name, settings.QUERY_BUDGET_DEFAULT)
+        if budget is not None and len(log) > budget:
+            problems.append(f'{len(log)} запросов при лимите {budget}')
+        for shape, count in log.repeated(
+                settings.QUERY_REPEAT_LIMIT).items():
+            problems.append(f'N+1, {count} раз: {shape}')
+        if not problems:
+            return
+        metrics.inc('query_budget_violations_total', view=view_name)
+        message = f'{view_name}: ' + '; '.join(problems)
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetViolation(message)
+        logger.warning(message)
+
+
+class SlowQueryMiddleware:
+    """Пишет медленные запросы страницы в лог с планом выполнения"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.SLOW_QUERY_THRESHOLD is None:
+            return self.get_response(request)
+
+        def get_view_name():
+            match = request.resolver_match
+            return match.view_name if match else request.path
+
+        with slow_query_log(get_view_name):
+            return self.get_response(request)
+
+
+class ServerTimingMiddleware:
+    """
+    Добавляет заголовок Server-Timing к ответам страниц приложений
+    из SERVER_TIMING_APPS: время запросов к базе, шаблонов, кэша
+    и кода представления.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with collect() as timings:
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match is not None and match.app_name in settings.SERVER_TIMING_APPS:
+            response['Server-Timing'] = timings.header(
+                time.perf_counter() - started)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует cProfile запросы с подписанным заголовком
+    PROFILE_HEADER и каждый PROFILE_SAMPLE_RATE-й запрос в среднем.
+
+    Профили сохраняются в PROFILE_DIR, имя файла возвращается
+    в заголовке X-Profile. Сводку строит "manage.py profile_report".
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.should_profile(request):
+            return self.get_response(request)
+        profile = profiling.start()
+        if profile is None:
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.disable()
+        match = request.resolver_match
+        path = profiling.save(
+            profile, match.view_name if match else None,
+            request.headers.get('X-Request-ID', uuid.uuid4().hex))
+        response['X-Profile'] = path.name
+        return response
+
+
+class StackSamplingMiddleware:
+    """
+    Отмечает поток, обрабатывающий запрос, для фонового сэмплера стеков
+    (core.sampler), если задан SAMPLING_INTERVAL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SAMPLING_INTERVAL:
+            return self.get_response(request)
+        sampler = get_sampler()
+        thread_id = threading.get_ident()
+        sampler.active[thread_id] = 'unresolved'
+        try:
+            return self.get_response(request)
+        finally:
+            sampler.active.pop(thread_id, None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if settings.SAMPLING_INTERVAL:
+            get_sampler().active[threading.get_ident()] = (
+                request.resolver_match.view_name)
+
+
+class MetricsMiddleware:
+    """
+    Метрики запросов для /metrics: время ответа, статусы, запросы
+    к базе, время шаблонов и размеры загруженных файлов по маршрутам.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with collect() as timings:
+            response = self.get_response(request)
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.observe('http_request_duration_seconds',
+                        time.perf_counter() - started, view=view)
+        metrics.inc('http_responses_total', view=view,
+                    status=response.status_code)
+        metrics.inc('db_queries_total', timings.counts['db'], view=view)
+        metrics.inc('db_query_seconds_total', timings.durations['db'],
+                    view=view)
+        if timings.counts['tpl']:
+            metrics.observe('template_render_seconds',
+                            timings.durations['tpl'], view=view)
+        if (request.method == 'POST'
+                and request.content_type == 'multipart/form-data'):
+            for upload in request.FILES.values():
+                metrics.observe('upload_size_bytes', upload.size, view=view)
+        return response
+
+
+class RequestRecordingMiddleware:
+    """
+    Записывает случайный 1 из REQUEST_RECORDING_SAMPLE_RATE запросов
+    в лог core.recording строкой JSON, которую воспроизводит
+    load_test --replay. Cookies и тела запросов не сохраняются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.REQUEST_RECORDING_SAMPLE_RATE
+        if not rate or random.randrange(rate):
+            return self.get_response(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        latency = time.perf_counter() - started
+        match = request.resolver_match
+        if match is None or {match.namespace, match.url_name} & set(
+                settings.REQUEST_RECORDING_SKIP):
+            return response
+        recording_logger.info(json.dumps({
+            'time': time.time(),
+            'method': request.method,
+            'url_name': match.view_name,
+            'kwargs': match.kwargs,
+            'query': request.META.get('QUERY_STRING', ''),
+            'authenticated': request.user.is_authenticated,
+            'status': response.status_code,
+            'size': None if response.streaming else len(response.content),
+            'latency_ms': round(latency * 1000, 2),
+        }, default=str, ensure_ascii=False))
+        return response
+
+
+class MemoryTracingMiddleware:
+    """
+    При MEMORY_TRACING включает tracemalloc, пишет пик выделенной
+    за запрос памяти в метрику request_peak_memory_bytes по маршрутам
+    и периодически сохраняет снимки для поиска утечек.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.MEMORY_TRACING:
+            return self.get_response(request)
+        memory.start()
+        started_with = memory.begin_request()
+        response = self.get_response(request)
+        match = request.resolver_match
+        metrics.observe(
+            'request_peak_memory_bytes', memory.end_request(started_with),
+            view=match.view_name if match else 'unresolved')
+        memory.maybe_take_snapshot()
+        return response
@@ -0,0 +1,55 @@
+import cProfile
+import random
+import re
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+TOKEN_SALT = 'core.profiling'
+TOKEN_VALUE = 'profile'
+
+
+def make_token():
+    """Подписанное значение заголовка PROFILE_HEADER"""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(TOKEN_VALUE)
+
+
+def check_token(token):
+    try:
+        return signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILE_TOKEN_MAX_AGE) == TOKEN_VALUE
+    except signing.BadSignature:
+        return False
+
+
+def should_profile(request):
+    """Подписанный заголовок или случайный 1 из PROFILE_SAMPLE_RATE"""
+    token = request.headers.get(settings.PROFILE_HEADER)
+    if token:
+        return check_token(token)
+    rate = settings.PROFILE_SAMPLE_RATE
+    return bool(rate) and random.randrange(rate) == 0
+
+
+def start():
+    """Запускает cProfile или возвращает None, если профилировщик занят"""
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # С Python 3.12 одновременно может работать один профилировщик.
+        return None
+    return profile
+
+
+def save(profile, view_name, request_id):
+    """Сохраняет профиль в PROFILE_DIR как <маршрут>.<id запроса>.prof"""
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = re.sub(r'[^\w-]', '-', view_name or 'unresolved')
+    request_id = re.sub(r'[^\w-]', '', request_id)[:64] or uuid.uuid4().hex
+    path = directory / f'{name}.{request_id}.prof'
+    profile.dump_stats(path)
+    return path
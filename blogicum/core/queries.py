@@ -0,0 +1,65 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+_STRING_LITERALS = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERALS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LISTS = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+
+
+def normalize(sql):
+    """Форма запроса: SQL без значений и с одинаковыми списками IN"""
+    sql = _STRING_LITERALS.sub('?', sql)
+    sql = _NUMBER_LITERALS.sub('?', sql)
+    sql = _PLACEHOLDER_LISTS.sub('(...)', sql)
+    return ' '.join(sql.split())
+
+
+class QueryLog:
+    """Запросы к базе, выполненные внутри record_queries"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __len__(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(query['duration'] for query in self.queries)
+
+    def shapes(self):
+        """Количество запросов каждой формы"""
+        return Counter(normalize(query['sql']) for query in self.queries)
+
+    def repeated(self, limit):
+        """Формы, повторённые больше limit раз: признак N+1"""
+        return {shape: count for shape, count in self.shapes().items()
+                if count > limit}
+
+
+@contextmanager
+def record_queries():
+    """Записывает SQL, параметры и время всех запросов внутри блока"""
+    log = QueryLog()
+
+    def wrapper(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            log.queries.append({
+                'sql': sql,
+                'params': params,
+                'many': many,
+                'alias': context['connection'].alias,
+                'duration': time.perf_counter() - started,
+            })
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield log
@@ -0,0 +1,84 @@
+import atexit
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def format_stack(frame, root):
+    """Стек в формате collapsed stacks: корень слева, через ';'"""
+    names = []
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '?')
+        names.append(f'{module}:{frame.f_code.co_name}')
+        frame = frame.f_back
+    names.append(root)
+    return ';'.join(reversed(names))
+
+
+class StackSampler(threading.Thread):
+    """
+    Раз в interval секунд снимает стеки потоков, обрабатывающих запросы,
+    и считает их вместе с именем маршрута.
+
+    Накопленные счётчики раз в SAMPLING_FLUSH_INTERVAL секунд
+    перезаписываются в SAMPLING_DIR/<pid>.collapsed. Если снятие стеков
+    занимает больше SAMPLING_MAX_OVERHEAD от интервала, интервал
+    удваивается.
+    """
+
+    def __init__(self, interval):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.interval = interval
+        self.active = {}
+        self.stacks = Counter()
+        self.lock = threading.Lock()
+        self.path = Path(settings.SAMPLING_DIR) / f'{os.getpid()}.collapsed'
+
+    def run(self):
+        flush_at = time.monotonic() + settings.SAMPLING_FLUSH_INTERVAL
+        while True:
+            time.sleep(self.interval)
+            started = time.perf_counter()
+            self.sample()
+            cost = time.perf_counter() - started
+            if cost > self.interval * settings.SAMPLING_MAX_OVERHEAD:
+                self.interval *= 2
+            if time.monotonic() > flush_at:
+                self.flush()
+                flush_at = time.monotonic() + settings.SAMPLING_FLUSH_INTERVAL
+
+    def sample(self):
+        frames = sys._current_frames()
+        with self.lock:
+            for thread_id, view_name in list(self.active.items()):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.stacks[format_stack(frame, view_name)] += 1
+
+    def flush(self):
+        with self.lock:
+            lines = [f'{stack} {count}\n'
+                     for stack, count in self.stacks.items()]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.tmp')
+        temporary.write_text(''.join(lines))
+        temporary.replace(self.path)
+
+
+def get_sampler():
+    """Сэмплер текущего процесса; после fork запускается заново"""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None or _sampler.path.stem != str(os.getpid()):
+            _sampler = StackSampler(settings.SAMPLING_INTERVAL)
+            _sampler.start()
+            atexit.register(_sampler.flush)
+        return _sampler
@@ -0,0 +1,72 @@
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+}
+
+
+def explain(connection, sql, params):
+    """План запроса средствами базы или пустая строка"""
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if prefix is None or not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except DatabaseError:
+        return ''
+    return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+
+@contextmanager
+def slow_query_log(get_view_name, threshold=None):
+    """
+    Пишет в лог core.slowlog запросы дольше threshold миллисекунд
+    (по умолчанию SLOW_QUERY_THRESHOLD) вместе с планом выполнения.
+
+    get_view_name вызывается для медленного запроса и возвращает
+    имя представления, из которого он выполнен.
+    """
+    if threshold is None:
+        threshold = settings.SLOW_QUERY_THRESHOLD
+    explaining = False
+
+    def wrapper(execute, sql, params, many, context):
+        nonlocal explaining
+        if explaining:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = (time.perf_counter() - started) * 1000
+        if duration >= threshold:
+            explaining = True
+            try:
+                plan = '' if many else explain(
+                    context['connection'], sql, params)
+            finally:
+                explaining = False
+            logger.warning(json.dumps({
+                'time': time.time(),
+                'view': get_view_name(),
+                'duration_ms': round(duration, 2),
+                'sql': sql,
+                'params': params,
+                'explain': plan,
+            }, ensure_ascii=False, default=str))
+        return result
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield
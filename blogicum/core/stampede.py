@@ -0,0 +1,89 @@
+import functools
+import hashlib
+import math
+import random
+import time
+
+from django.core.cache import cache as default_cache
+
+LOCK_TIMEOUT = 30
+STALE_TIMEOUT = 60 * 10
+WAIT_TIMEOUT = 5
+WAIT_STEP = 0.05
+
+
+def get_or_compute(key, compute, timeout, beta=1.0, cache=None):
+    """
+    Значение из кэша с защитой от одновременного пересчёта.
+
+    Пересчитывает значение только тот, кто взял блокировку на ключ,
+    остальные получают устаревшее значение. Запись начинает
+    обновляться заранее с вероятностью, растущей к концу срока жизни
+    (XFetch): чем дольше считается значение и чем больше beta,
+    тем раньше. Устаревшее значение хранится ещё STALE_TIMEOUT секунд.
+    """
+    cache = cache or default_cache
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires_at = entry
+        early = delta * beta * math.log(1 - random.random())
+        if time.time() - early < expires_at:
+            return value
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        if entry is not None:
+            return entry[0]
+        entry = wait_for(cache, key)
+        if entry is not None:
+            return entry[0]
+        return compute()
+
+    try:
+        started = time.time()
+        value = compute()
+        delta = time.time() - started
+        cache.set(key, (value, delta, time.time() + timeout),
+                  timeout + STALE_TIMEOUT)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+def wait_for(cache, key):
+    """Ждёт значение, которое считает другой процесс"""
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_STEP)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def make_key(prefix, *parts):
+    digest = hashlib.md5(
+        ':'.join(str(part) for part in parts).encode(),
+        usedforsecurity=False).hexdigest()
+    return f'stampede:{prefix}:{digest}'
+
+
+def single_flight(timeout, key=None, beta=1.0):
+    """
+    Декоратор get_or_compute для функции.
+
+    key — функция от аргументов декорируемой функции, возвращающая
+    ключ кэша; по умолчанию ключ строится из имени функции и аргументов.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if key is not None:
+                cache_key = key(*args, **kwargs)
+            else:
+                cache_key = make_key(
+                    func.__qualname__, *args, *sorted(kwargs.items()))
+            return get_or_compute(
+                cache_key, lambda: func(*args, **kwargs), timeout, beta)
+        return wrapper
+    return decorator
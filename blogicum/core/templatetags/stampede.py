@@ -0,0 +1,43 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.stampede import get_or_compute, make_key
+
+register = template.Library()
+
+
+class SingleFlightNode(template.Node):
+    def __init__(self, nodelist, timeout, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        if vary_on and vary_on[0] is None:
+            return self.nodelist.render(context)
+        key = make_key(f'fragment:{self.fragment_name}', *vary_on)
+        return mark_safe(get_or_compute(
+            key, lambda: self.nodelist.render(context),
+            self.timeout.resolve(context)))
+
+
+@register.tag('singleflight')
+def do_singleflight(parser, token):
+    """
+    Кэширует фрагмент шаблона с защитой от одновременного пересчёта.
+
+    {% singleflight 60 fragment_name key [key ...] %} ... {% endsingleflight %}
+
+    Если первый ключ равен None, фрагмент рендерится без кэша.
+    """
+    nodelist = parser.parse(('endsingleflight',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least 2 arguments.")
+    return SingleFlightNode(
+        nodelist, parser.compile_filter(bits[1]), bits[2],
+        [parser.compile_filter(bit) for bit in bits[3:]])
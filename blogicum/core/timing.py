@@ -0,0 +1,116 @@
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+_timings = ContextVar('server_timing', default=None)
+_original_render = Template.render
+
+
+class Timings:
+    """Время и количество операций по видам за один запрос"""
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.counts = Counter()
+        self.in_template = defaultdict(float)
+        self.template_depth = 0
+
+    def add(self, name, seconds):
+        self.durations[name] += seconds
+        self.counts[name] += 1
+        if self.template_depth:
+            self.in_template[name] += seconds
+
+    def header(self, total):
+        """
+        Значение заголовка Server-Timing.
+
+        view — время кода представления: всё, что осталось от total
+        после шаблонов и запросов к базе и кэшу вне шаблонов.
+        """
+        template = self.durations['tpl']
+        outside = sum(self.durations[name] - self.in_template[name]
+                      for name in ('db', 'cache'))
+        metrics = [
+            ('db', self.durations['db'], f'{self.counts["db"]} queries'),
+            ('tpl', template, None),
+            *((name, self.durations[name], f'{self.counts[name]} renders')
+              for name in settings.SERVER_TIMING_TEMPLATES.values()),
+            ('cache', self.durations['cache'],
+             f'{self.counts["cache"]} lookups'),
+            ('view', max(total - template - outside, 0), None),
+            ('total', total, None),
+        ]
+        return ', '.join(
+            f'{name};dur={seconds * 1000:.1f}'
+            + (f';desc="{description}"' if description else '')
+            for name, seconds, description in metrics)
+
+
+@contextmanager
+def timed(name):
+    """Учитывает время блока в текущем сборе Server-Timing"""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+@contextmanager
+def collect():
+    """
+    Собирает время запросов к базе, шаблонов и кэша внутри блока.
+
+    Вложенный вызов возвращает уже идущий сбор.
+    """
+    active = _timings.get()
+    if active is not None:
+        yield active
+        return
+    timings = Timings()
+    token = _timings.set(timings)
+
+    def wrapper(execute, sql, params, many, context):
+        with timed('db'):
+            return execute(sql, params, many, context)
+
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(wrapper))
+            yield timings
+    finally:
+        _timings.reset(token)
+
+
+def timed_render(self, context):
+    """
+    Template.render с учётом времени: внешний шаблон идёт в tpl,
+    шаблоны из SERVER_TIMING_TEMPLATES — ещё и под своими именами.
+    """
+    timings = _timings.get()
+    if timings is None:
+        return _original_render(self, context)
+    name = settings.SERVER_TIMING_TEMPLATES.get(self.origin.template_name)
+    outermost = not timings.template_depth
+    timings.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        timings.template_depth -= 1
+        if outermost:
+            timings.add('tpl', elapsed)
+        if name:
+            timings.add(name, elapsed)
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseForbidden
+from django.shortcuts import render
+
+from . import memory, metrics
+
+
+def prometheus_metrics(request):
+    """Метрики всех процессов в формате Prometheus"""
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@staff_member_required
+def memory_report(request):
+    """Страница админки с растущими местами выделения памяти"""
+    return render(request, 'admin/memory_report.html', {
+        **admin.site.each_context(request),
+        'title': 'Рост памяти',
+        'report': memory.report(),
+        'tracing': settings.MEMORY_TRACING,
+    })
@@ -27,3 +27,8 @@ def csrf_failure(request, reason=''):
 def internal_server_error(request):
     """Кастомная страница ошибки 500"""
     return render(request, 'pages/500.html', status=500)
+
+
+def service_unavailable(request, exception=None):
+    """Кастомная страница ошибки 503"""
+    return render(request, 'pages/503.html', status=503)
@@ -41,6 +41,21 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def raise_on_query_budget():
+    with override_settings(QUERY_BUDGET_RAISE=True):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from django.core.cache import caches
+
+    for cache in caches.all():
+        cache.clear()
+    yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
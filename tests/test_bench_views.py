@@ -0,0 +1,56 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from blog import seed, signals
+from blog.models import Category, Comment, FeedEntry, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_seed_creates_dataset(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    counts = seed.seed(400, batch_size=150, images=0.5, scheduled=0.1,
+                       unpublished=0.1, random_seed=1)
+    assert Post.objects.count() == 400
+    assert Comment.objects.count() == counts["comments"]
+    assert Post.objects.exclude(image="").exists()
+    assert Post.objects.filter(pub_date__gt=timezone.now()).exists()
+    assert Category.objects.filter(is_published=False).exists()
+    listed = Post.objects.filter(
+        is_published=True, category__is_published=True).count()
+    assert FeedEntry.objects.count() == listed, (
+        "Убедитесь, что после наполнения лента пересобрана."
+    )
+
+
+def test_seed_does_not_send_blog_signals(monkeypatch):
+    monkeypatch.setattr(
+        "blog.feed.sync_post",
+        lambda post: pytest.fail("Сигналы блога должны быть отключены."))
+    with signals.muted():
+        mixer.blend("blog.Post")
+
+
+def test_bench_views_covers_all_routes(tmp_path):
+    seed.seed(20, random_seed=1)
+    baseline = tmp_path / "baseline.json"
+    call_command("bench_views", requests=2, warmup=0,
+                 baseline=str(baseline), save_baseline=True)
+    results = json.loads(baseline.read_text())["results"]
+    assert {"blog:index", "blog:post_detail", "blog:add_comment",
+            "pages:about"} <= set(results)
+    assert not any(stats["errors"] for stats in results.values()), (
+        "Убедитесь, что бенчмарк не получает ошибок ни на одном маршруте."
+    )
+
+    for stats in results.values():
+        stats["queries"] = 0
+    baseline.write_text(json.dumps({"scale": "1k", "results": results}))
+    with pytest.raises(CommandError):
+        call_command("bench_views", requests=2, warmup=0,
+                     baseline=str(baseline))
@@ -0,0 +1,86 @@
+from django.core.cache import caches
+
+from core import cache as tiered
+
+
+def get_tiered():
+    backend = caches["default"]
+    assert isinstance(backend, tiered.TieredCache), (
+        "Убедитесь, что кэш по умолчанию — двухуровневый TieredCache."
+    )
+    return backend
+
+
+def test_local_tier_serves_repeated_reads():
+    backend = get_tiered()
+    backend.set("key", {"value": 1})
+    backend.get("key")
+    before = backend.get_stats()
+    assert backend.get("key") == {"value": 1}
+    after = backend.get_stats()
+    assert after["local_hits"] == before["local_hits"] + 1
+    assert after["shared_hits"] == before["shared_hits"]
+
+
+def test_local_tier_is_size_bounded():
+    lru = tiered.LocalLRU(max_size=10)
+    lru.set("a", b"12345", 60)
+    lru.set("b", b"12345", 60)
+    lru.set("c", b"12345", 60)
+    assert lru.get("a") is None
+    assert lru.get("c") == b"12345"
+    assert lru.size <= 10
+
+
+def test_remote_write_invalidates_local_tier():
+    backend = get_tiered()
+    backend.set("key", "old")
+    backend._local.polled_at = 0
+    assert backend.get("key") == "old"
+    made_key = backend.make_key("key")
+    backend.shared.set(made_key, "new")
+    seq = backend.shared.incr(tiered.SEQ_KEY)
+    backend.shared.set(
+        tiered.LOG_KEY.format(seq), ("another-process", [made_key]))
+    backend._local.polled_at = 0
+    assert backend.get("key") == "new", (
+        "Убедитесь, что запись из другого процесса сбрасывает значение "
+        "в локальном кэше."
+    )
+
+
+def test_single_flight_serves_stale_while_locked():
+    from core.stampede import get_or_compute
+
+    backend = caches["default"]
+    assert get_or_compute("feed", lambda: "old", timeout=0) == "old"
+    backend.add("feed:lock", 1)
+    assert get_or_compute("feed", lambda: "new", timeout=60) == "old", (
+        "Убедитесь, что пока значение пересчитывает другой процесс, "
+        "отдаётся устаревшее значение."
+    )
+    backend.delete("feed:lock")
+    assert get_or_compute("feed", lambda: "new", timeout=60) == "new"
+
+
+def test_single_flight_decorator_and_tag():
+    from django.template import Context, Template
+
+    from core.stampede import single_flight
+
+    calls = []
+
+    @single_flight(60)
+    def expensive(value):
+        calls.append(value)
+        return value * 2
+
+    assert expensive(2) == expensive(2) == 4
+    assert calls == [2]
+
+    template = Template(
+        "{% load stampede %}{% singleflight 60 test key %}"
+        "{{ value }}{% endsingleflight %}")
+    assert template.render(Context({"key": 1, "value": "a"})) == "a"
+    assert template.render(Context({"key": 1, "value": "b"})) == "a"
+    assert template.render(Context({"key": None, "value": "b"})) == "b"
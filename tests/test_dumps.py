@@ -0,0 +1,106 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+from blog import dumps
+from blog.models import Category, Comment, FeedEntry, Post, User
+
+pytestmark = [pytest.mark.django_db]
+
+CREATED_AT = "2022-12-18T23:03:52.159Z"
+
+
+def make_dump():
+    # Посты идут раньше категории и автора, на которых ссылаются.
+    return [
+        {"model": "blog.post", "pk": pk, "fields": {
+            "title": f"Пост {pk}", "text": "Текст", "author": 7,
+            "category": 5, "location": None, "is_published": True,
+            "pub_date": CREATED_AT, "created_at": CREATED_AT}}
+        for pk in range(1, 6)
+    ] + [
+        {"model": "blog.category", "pk": 5, "fields": {
+            "title": "Категория", "description": "Описание",
+            "slug": "dump", "is_published": True,
+            "created_at": CREATED_AT}},
+        {"model": "auth.user", "pk": 7, "fields": {
+            "username": "dump-author", "password": "!",
+            "groups": [], "user_permissions": []}},
+        {"model": "blog.comment", "pk": 3, "fields": {
+            "text": "Комментарий", "post": 1, "author": 7,
+            "created_at": CREATED_AT}},
+        {"model": "blog.feedentry", "pk": 1, "fields": {"post": 1}},
+    ]
+
+
+def test_iter_objects_reads_array_and_jsonl():
+    objects = make_dump()
+    array = io.StringIO(json.dumps(objects, indent=2))
+    assert list(dumps.iter_objects(array, read_size=7)) == objects
+    lines = io.StringIO("\n".join(json.dumps(obj) for obj in objects))
+    assert list(dumps.iter_objects(lines, read_size=7)) == objects
+
+
+def test_import_blog(tmp_path):
+    path = tmp_path / "dump.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as dump:
+        dump.writelines(json.dumps(obj) + "\n" for obj in make_dump())
+
+    call_command("import_blog", str(path), batch_size=2)
+    call_command("import_blog", str(path), batch_size=2)
+
+    assert Post.objects.count() == 5
+    assert Comment.objects.get().created_at.year == 2022, (
+        "Убедитесь, что даты из дампа не заменяются текущим временем."
+    )
+    assert FeedEntry.objects.filter(comment_count=1).count() == 1, (
+        "Убедитесь, что после загрузки дампа лента пересобрана."
+    )
+    assert FeedEntry.objects.count() == 5
+    assert Category.objects.create(
+        title="Новая", description="-", slug="new").pk > 5
+    assert User.objects.create(username="new").pk > 7
+
+
+def test_export_blog_round_trip(tmp_path, mixer, published_category):
+    posts = mixer.cycle(3).blend("blog.Post", category=published_category)
+    mixer.blend("blog.Comment", post=posts[0])
+    state = tmp_path / "state.json"
+    call_command("export_blog", output_dir=str(tmp_path), gzip=True,
+                 state=str(state))
+    assert "password" not in gzip.open(
+        tmp_path / "user.jsonl.gz", "rt").read(), (
+        "Убедитесь, что пароли пользователей не выгружаются."
+    )
+
+    new_post = mixer.blend("blog.Post", category=published_category)
+    incremental = tmp_path / "incremental"
+    call_command("export_blog", "blog.post", format="csv",
+                 output_dir=str(incremental), state=str(state))
+    with open(incremental / "post.csv", newline="") as exported:
+        rows = list(csv.reader(exported))
+    assert [row[0] for row in rows[1:]] == [str(new_post.pk)], (
+        "Убедитесь, что повторная выгрузка содержит только новые строки."
+    )
+    assert json.loads(state.read_text())["blog.post"] == new_post.pk
+
+    Post.objects.all().delete()
+    call_command("import_blog", *(
+        str(tmp_path / f"{name}.jsonl.gz")
+        for name in ("category", "location", "user", "post", "comment")))
+    assert Post.objects.count() == 3
+    assert Comment.objects.get().post_id == posts[0].pk
+
+
+def test_admin_export_action(admin_client, mixer):
+    post = mixer.blend("blog.Post")
+    response = admin_client.post("/admin/blog/post/", {
+        "action": "export_jsonl", "_selected_action": [post.pk]})
+    assert response.status_code == 200
+    record = json.loads(b"".join(response.streaming_content))
+    assert record["pk"] == post.pk
+    assert record["fields"]["title"] == post.title
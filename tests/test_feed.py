@@ -0,0 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import FeedEntry, TimelineEntry
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_feed_entry_follows_post(mixer, published_category):
+    post = mixer.blend("blog.Post", category=published_category)
+    entry = FeedEntry.objects.get(post=post)
+    assert entry.title == post.title
+    assert entry.category_slug == published_category.slug
+
+    post.is_published = False
+    post.save()
+    assert not FeedEntry.objects.filter(post=post).exists(), (
+        "Убедитесь, что снятый с публикации пост удаляется из ленты."
+    )
+
+
+def test_feed_entry_follows_category_and_comments(
+        mixer, published_category
+):
+    post = mixer.blend("blog.Post", category=published_category)
+    comment = mixer.blend("blog.Comment", post=post)
+    assert FeedEntry.objects.get(post=post).comment_count == 1
+    comment.delete()
+    assert FeedEntry.objects.get(post=post).comment_count == 0
+
+    published_category.is_published = False
+    published_category.save()
+    assert not FeedEntry.objects.exists()
+    published_category.is_published = True
+    published_category.save()
+    assert FeedEntry.objects.filter(post=post).exists()
+
+
+def test_scheduled_post_hidden_until_pub_date(
+        mixer, client, published_category
+):
+    mixer.blend(
+        "blog.Post", category=published_category,
+        pub_date=timezone.now() + timedelta(days=1))
+    assert FeedEntry.objects.count() == 1
+    response = client.get("/")
+    assert len(response.context["page_obj"]) == 0
+
+
+def test_rebuild_feed(mixer, published_category):
+    mixer.cycle(3).blend("blog.Post", category=published_category)
+    FeedEntry.objects.all().delete()
+    call_command("rebuild_feed", stdout=StringIO())
+    assert FeedEntry.objects.count() == 3
+
+
+def test_index_reads_single_table(mixer, client, published_category):
+    mixer.cycle(12).blend("blog.Post", category=published_category)
+    with CaptureQueriesContext(connection) as queries:
+        client.get("/")
+    feed_queries = [q["sql"] for q in queries if "blog_" in q["sql"]]
+    page_queries = [sql for sql in feed_queries if "ORDER BY" in sql]
+    assert len(page_queries) == 1, feed_queries
+    assert all("JOIN" not in sql for sql in feed_queries), feed_queries
+
+    with CaptureQueriesContext(connection) as queries:
+        client.get("/")
+    assert not [q for q in queries if "blog_" in q["sql"]], (
+        "Убедитесь, что повторный запрос страницы ленты берётся из кэша."
+    )
+
+
+def get_follow_feed(client):
+    response = client.get("/follow/")
+    assert response.status_code == 200
+    return list(response.context["page_obj"])
+
+
+def test_follow_feed_fan_out(
+        mixer, user, user_client, another_user, published_category
+):
+    old_post = mixer.blend(
+        "blog.Post", author=another_user, category=published_category)
+    user_client.post(f"/profile/{another_user.username}/follow/")
+    new_post = mixer.blend(
+        "blog.Post", author=another_user, category=published_category)
+    mixer.blend("blog.Post", category=published_category)
+    assert {post.pk for post in get_follow_feed(user_client)} == {
+        old_post.pk, new_post.pk}, (
+        "Убедитесь, что в ленте подписок видны посты авторов из подписок."
+    )
+
+    user_client.post(f"/profile/{another_user.username}/unfollow/")
+    assert get_follow_feed(user_client) == []
+
+
+def test_follow_feed_fan_out_on_read(
+        mixer, settings, user, user_client, another_user, published_category
+):
+    settings.TIMELINE_FANOUT_LIMIT = 2
+    mixer.blend("blog.Follow", author=another_user)
+    user_client.post(f"/profile/{another_user.username}/follow/")
+    post = mixer.blend(
+        "blog.Post", author=another_user, category=published_category)
+    assert not TimelineEntry.objects.exists()
+    assert [item.pk for item in get_follow_feed(user_client)] == [post.pk]
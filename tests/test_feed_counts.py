@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+
+from blog import counters
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_paginator_count(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.context["paginator"].count
+
+
+def test_index_count_is_cached(mixer, client, published_category):
+    mixer.cycle(3).blend("blog.Post", category=published_category)
+    assert get_paginator_count(client, "/") == 3
+    assert cache.get(counters.count_key()) == 3, (
+        "Убедитесь, что количество постов главной страницы кэшируется."
+    )
+
+
+def test_count_updated_on_save_and_delete(
+        mixer, client, user, published_category
+):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category)
+    category_url = f"/category/{published_category.slug}/"
+    assert get_paginator_count(client, "/") == 3
+    assert get_paginator_count(client, category_url) == 3
+
+    mixer.blend("blog.Post", author=user, category=published_category)
+    posts[0].is_published = False
+    posts[0].save()
+    posts[1].delete()
+
+    assert cache.get(counters.count_key()) == 2
+    assert get_paginator_count(client, "/") == 2
+    assert get_paginator_count(client, category_url) == 2
+    assert get_paginator_count(client, f"/profile/{user.username}/") == 2
+
+
+def test_count_invalidated_on_category_unpublish(
+        mixer, client, published_category
+):
+    mixer.cycle(3).blend("blog.Post", category=published_category)
+    assert get_paginator_count(client, "/") == 3
+    published_category.is_published = False
+    published_category.save()
+    assert get_paginator_count(client, "/") == 0
+
+
+def test_count_refreshed_after_scheduled_post(
+        mixer, client, published_category, monkeypatch
+):
+    now = timezone.now()
+    mixer.blend("blog.Post", category=published_category)
+    mixer.blend(
+        "blog.Post", category=published_category,
+        pub_date=now + timedelta(days=1))
+    assert get_paginator_count(client, "/") == 1
+    monkeypatch.setattr(timezone, "now", lambda: now + timedelta(days=2))
+    assert get_paginator_count(client, "/") == 2, (
+        "Убедитесь, что счётчик пересчитывается, когда наступает время "
+        "публикации отложенного поста."
+    )
+
+
+@override_settings(POST_COUNT_ESTIMATE_THRESHOLD=5)
+def test_estimate_count(mixer, published_category):
+    mixer.cycle(20).blend("blog.Post", category=published_category)
+    queryset = Post.objects.all()
+    assert counters.estimate_count(queryset) == 20
+    assert counters.estimate_count(queryset.filter(pk__lt=0)) == 0
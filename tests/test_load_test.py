@@ -0,0 +1,51 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+from blog import seed
+from core import loadgen
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture(autouse=True)
+def fast_password_hasher(settings):
+    settings.PASSWORD_HASHERS = [
+        "django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+@pytest.mark.parametrize("target", [{}, {"wsgi": True}])
+def test_load_test_mix(tmp_path, target):
+    seed.seed(30, random_seed=1)
+    output = tmp_path / "results.json"
+    # Тестовая база SQLite в памяти с общим кэшем блокирует таблицы
+    # целиком, поэтому параллельные запросы здесь не проверяются.
+    call_command("load_test", requests=40, concurrency=1, seed=1,
+                 output=str(output), **target)
+    results = json.loads(output.read_text())
+    assert results["total"]["requests"] == 40
+    assert {"blog:index", "blog:post_detail", "login"} <= set(results)
+    assert results["total"]["errors"] == 0, (
+        "Убедитесь, что нагрузочный тест не получает ошибок."
+    )
+
+
+def test_load_test_replay(tmp_path, mixer):
+    post = mixer.blend("blog.Post")
+    replay = tmp_path / "requests.jsonl"
+    replay.write_text("\n".join(json.dumps(record) for record in [
+        {"method": "GET", "url_name": "blog:post_detail",
+         "kwargs": {"post_id": post.pk}, "query": "",
+         "authenticated": False},
+        {"method": "GET", "url_name": "blog:index", "kwargs": {},
+         "query": "page=1", "authenticated": True},
+        {"method": "GET", "url_name": "removed:route", "kwargs": {}},
+    ]))
+    assert len(loadgen.read_records(replay)) == 3
+    output = tmp_path / "results.json"
+    call_command("load_test", replay=[str(replay)], requests=10,
+                 concurrency=1, output=str(output))
+    results = json.loads(output.read_text())
+    assert set(results) <= {"blog:post_detail", "blog:index", "total"}
+    assert results["total"]["requests"] == 10
@@ -0,0 +1,46 @@
+import pickle
+import tracemalloc
+
+import pytest
+from django.test import override_settings
+
+from core import memory
+
+pytestmark = [pytest.mark.django_db]
+
+
+def write_snapshots(directory, *snapshots):
+    for number, sizes in enumerate(snapshots, 1):
+        (directory / f"1.{number}.snapshot").write_bytes(pickle.dumps(sizes))
+
+
+def test_growing_sites(tmp_path):
+    write_snapshots(
+        tmp_path,
+        {"views.py:1": 100, "views.py:2": 500},
+        {"views.py:1": 200, "views.py:2": 100, "feed.py:3": 10},
+        {"views.py:1": 300, "views.py:2": 600, "feed.py:3": 50},
+    )
+    with override_settings(MEMORY_SNAPSHOT_DIR=str(tmp_path)):
+        sites = memory.growing_sites(memory.list_snapshots(1))
+    assert [site["site"] for site in sites] == ["views.py:1", "feed.py:3"], (
+        "Убедитесь, что в отчёт попадают только места, память которых "
+        "растёт от снимка к снимку."
+    )
+
+
+@override_settings(MEMORY_TRACING=True, MEMORY_SNAPSHOT_INTERVAL=0)
+def test_middleware_takes_snapshots(tmp_path, client):
+    try:
+        with override_settings(MEMORY_SNAPSHOT_DIR=str(tmp_path)):
+            assert client.get("/").status_code == 200
+            assert len(memory.list_snapshots()) == 1
+    finally:
+        tracemalloc.stop()
+
+
+def test_admin_page_is_staff_only(client, user_client, django_user_model):
+    assert user_client.get("/admin/memory/").status_code == 302
+    admin = django_user_model.objects.create_superuser("admin", "", "pass")
+    client.force_login(admin)
+    assert client.get("/admin/memory/").status_code == 200
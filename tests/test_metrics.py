@@ -0,0 +1,52 @@
+import pickle
+from collections import Counter
+
+import pytest
+from django.test import override_settings
+
+from core import metrics
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "_counters", Counter())
+    monkeypatch.setattr(metrics, "_histograms", {})
+    with override_settings(METRICS_DIR=str(tmp_path)):
+        yield tmp_path
+
+
+def test_metrics_endpoint(metrics_dir, client):
+    client.get("/")
+    client.get("/")
+    body = client.get("/metrics").content.decode()
+    assert (
+        'http_request_duration_seconds_count{view="blog:index"} 2' in body
+    ), "Убедитесь, что /metrics отдаёт гистограмму времени ответа."
+    assert 'http_responses_total{status="200",view="blog:index"} 2' in body
+    assert 'db_queries_total{view="blog:index"}' in body
+    assert 'template_render_seconds_bucket{view="blog:index",le="+Inf"} 2' in (
+        body)
+    assert "cache_operations_total{" in body
+
+
+def test_metrics_summed_across_processes(metrics_dir, client):
+    counters = Counter({
+        ("http_responses_total", (("status", 200), ("view", "blog:index"))):
+            5,
+    })
+    (metrics_dir / "1.pickle").write_bytes(
+        pickle.dumps({"counters": counters, "histograms": {}}))
+    client.get("/")
+    body = client.get("/metrics").content.decode()
+    assert 'http_responses_total{status="200",view="blog:index"} 6' in body, (
+        "Убедитесь, что метрики разных процессов складываются."
+    )
+
+
+@override_settings(METRICS_TOKEN="secret")
+def test_metrics_token(metrics_dir, client):
+    assert client.get("/metrics").status_code == 403
+    assert client.get(
+        "/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code == 200
@@ -0,0 +1,25 @@
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+
+from core import profiling
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_signed_header_request_is_profiled(tmp_path, client, capsys):
+    with override_settings(PROFILE_DIR=str(tmp_path)):
+        response = client.get(
+            "/", HTTP_X_PROFILE_TOKEN=profiling.make_token(),
+            HTTP_X_REQUEST_ID="abc")
+        assert response["X-Profile"] == "blog-index.abc.prof"
+        assert (tmp_path / "blog-index.abc.prof").exists()
+        call_command("profile_report", view="blog:index", limit=5)
+    assert "Профилей: 1" in capsys.readouterr().out
+
+
+def test_unsigned_header_is_ignored(tmp_path, client):
+    with override_settings(PROFILE_DIR=str(tmp_path)):
+        response = client.get("/", HTTP_X_PROFILE_TOKEN="profile:forged")
+    assert "X-Profile" not in response
+    assert not list(tmp_path.iterdir())
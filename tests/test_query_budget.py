@@ -0,0 +1,33 @@
+import pytest
+from django.test import override_settings
+
+from core.middleware import QueryBudgetViolation
+from core.queries import normalize
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_normalize_groups_queries_by_shape():
+    assert normalize(
+        'SELECT * FROM "blog_post" WHERE "id" IN (%s, %s) LIMIT 21'
+    ) == normalize(
+        'SELECT *  FROM "blog_post" WHERE "id" IN (%s) LIMIT 5'
+    )
+    assert normalize("SELECT 'a'") != normalize("SELECT 'a' FROM t")
+
+
+@override_settings(QUERY_BUDGETS={"blog:index": 1})
+def test_budget_violation_raised(client):
+    with pytest.raises(QueryBudgetViolation):
+        client.get("/")
+
+
+def test_detail_comments_have_no_n_plus_one(
+        mixer, client, post_with_published_location
+):
+    mixer.cycle(10).blend("blog.Comment", post=post_with_published_location)
+    response = client.get(f"/posts/{post_with_published_location.id}/")
+    assert response.status_code == 200, (
+        "Убедитесь, что комментарии к посту загружаются без запроса "
+        "на каждый комментарий."
+    )
@@ -0,0 +1,81 @@
+import json
+import logging
+from collections import Counter
+
+import pytest
+from django.core.management import call_command
+
+from core import logs, metrics, middleware
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def recorded(settings, monkeypatch):
+    settings.REQUEST_RECORDING_SAMPLE_RATE = 1
+    messages = []
+    monkeypatch.setattr(middleware.recording_logger, "info", messages.append)
+    return messages
+
+
+def test_request_recorded(recorded, user_client, mixer):
+    post = mixer.blend("blog.Post")
+    user_client.get(f"/posts/{post.pk}/?page=2")
+    user_client.get("/metrics")
+    assert len(recorded) == 1, (
+        "Убедитесь, что запросы к /metrics и админке не записываются."
+    )
+    record = json.loads(recorded[0])
+    assert record["url_name"] == "blog:post_detail"
+    assert record["kwargs"] == {"post_id": post.pk}
+    assert record["query"] == "page=2"
+    assert record["authenticated"] is True
+    assert record["size"] > 0
+    assert "cookies" not in record and "body" not in record
+
+
+@pytest.mark.django_db(transaction=True)
+def test_recorded_requests_replay(recorded, client, tmp_path, mixer):
+    post = mixer.blend("blog.Post")
+    client.get("/")
+    client.get(f"/posts/{post.pk}/")
+    assert len(recorded) == 2
+    replay = tmp_path / "requests.jsonl"
+    replay.write_text("\n".join(recorded))
+    output = tmp_path / "results.json"
+    call_command("load_test", replay=[str(replay)], requests=20,
+                 concurrency=1, output=str(output))
+    results = json.loads(output.read_text())
+    assert set(results) <= {"blog:index", "blog:post_detail", "total"}
+    assert results["total"]["requests"] == 20
+    assert results["total"]["errors"] == 0
+
+
+def test_async_handler_writes_in_background(tmp_path):
+    path = tmp_path / "async.log"
+    handler = logs.AsyncHandler(
+        "logging.handlers.RotatingFileHandler", filename=str(path))
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.getLogger("tests.async")
+    logger.addHandler(handler)
+    try:
+        for number in range(100):
+            logger.warning("line %d", number)
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+    assert path.read_text().splitlines() == [
+        f"line {number}" for number in range(100)]
+
+
+def test_async_handler_drops_when_full(monkeypatch):
+    monkeypatch.setattr(metrics, "_counters", Counter())
+    handler = logs.AsyncHandler("logging.NullHandler", queue_size=1)
+    handler.listener.stop()
+    record = logging.makeLogRecord({"name": "tests.async", "msg": "x"})
+    for _ in range(3):
+        handler.handle(record)
+    assert metrics.get_counters()[
+        ("log_records_dropped_total", (("logger", "tests.async"),))] == 2, (
+        "Убедитесь, что при заполненной очереди записи отбрасываются."
+    )
@@ -0,0 +1,52 @@
+import pytest
+from django.test import override_settings
+
+from core import routers
+from core.middleware import PRIMARY_COOKIE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+def test_router_reads_from_replica_only_when_enabled():
+    router = routers.PrimaryReplicaRouter()
+    assert router.db_for_read(None) == "default"
+    with routers.replica_reads():
+        assert router.db_for_read(None) == "replica"
+        assert router.db_for_write(None) == "default"
+    assert not router.allow_migrate("replica", "blog")
+
+
+def record_replica_reads(monkeypatch):
+    calls = []
+
+    def choice(replicas):
+        calls.append(replicas)
+        return "default"
+
+    monkeypatch.setattr(routers.random, "choice", choice)
+    return calls
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+def test_blog_pages_read_from_replica(monkeypatch, client):
+    calls = record_replica_reads(monkeypatch)
+    assert client.get("/").status_code == 200
+    assert calls, (
+        "Убедитесь, что страницы блога читают данные с реплик."
+    )
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+def test_author_reads_primary_after_comment(
+        monkeypatch, user_client, post_with_published_location
+):
+    post_url = f"/posts/{post_with_published_location.id}/"
+    response = user_client.post(
+        f"{post_url}comment/", data={"text": "Комментарий"})
+    assert PRIMARY_COOKIE in response.cookies, (
+        "Убедитесь, что после комментария автор читает с основной базы."
+    )
+    calls = record_replica_reads(monkeypatch)
+    assert user_client.get(post_url).status_code == 200
+    assert not calls
@@ -0,0 +1,23 @@
+import threading
+
+from django.test import override_settings
+
+from core.sampler import StackSampler
+
+
+def test_sampler_writes_collapsed_stacks(tmp_path):
+    with override_settings(SAMPLING_DIR=str(tmp_path)):
+        sampler = StackSampler(interval=0.01)
+    sampler.active[threading.get_ident()] = "blog:index"
+    sampler.sample()
+    sampler.sample()
+    sampler.flush()
+    lines = sampler.path.read_text().splitlines()
+    assert len(lines) == 1
+    stack, count = lines[0].rsplit(" ", 1)
+    assert count == "2"
+    assert stack.startswith("blog:index;"), (
+        "Убедитесь, что стек начинается с имени маршрута."
+    )
+    assert stack.endswith("core.sampler:sample")
+    assert "test_sampler:test_sampler_writes_collapsed_stacks" in stack
@@ -0,0 +1,28 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+def test_index_has_server_timing(mixer, client, published_category):
+    mixer.cycle(3).blend("blog.Post", category=published_category)
+    response = client.get("/")
+    assert "Server-Timing" in response, (
+        "Убедитесь, что страницы блога отдают заголовок Server-Timing."
+    )
+    metrics = parse_server_timing(response["Server-Timing"])
+    assert {"db", "tpl", "post_card", "comments", "cache", "view",
+            "total"} <= set(metrics)
+    assert metrics["post_card"]["desc"] == '"3 renders"'
+    assert float(metrics["tpl"]["dur"]) <= float(metrics["total"]["dur"])
+
+
+def test_pages_have_server_timing(client):
+    assert "Server-Timing" in client.get("/pages/about/")
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+
+from blog.models import Post
+from core import slowlog
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_slow_query_logged_with_plan(monkeypatch):
+    messages = []
+    monkeypatch.setattr(slowlog.logger, "warning", messages.append)
+    with slowlog.slow_query_log(lambda: "blog:index", threshold=0):
+        list(Post.objects.filter(is_published=True))
+    records = [json.loads(message) for message in messages]
+    assert len(records) == 1, (
+        "Убедитесь, что медленный запрос пишется в лог один раз, "
+        "без запроса EXPLAIN."
+    )
+    assert records[0]["view"] == "blog:index"
+    assert records[0]["explain"], (
+        "Убедитесь, что к медленному запросу прикладывается план выполнения."
+    )
+
+
+def test_report_groups_queries_by_shape(tmp_path, capsys):
+    log = tmp_path / "slow.log"
+    lines = [
+        {"view": "blog:index", "duration_ms": duration, "explain": "SCAN",
+         "sql": f"SELECT * FROM blog_post LIMIT {duration}", "params": []}
+        for duration in (150, 300)
+    ]
+    log.write_text("\n".join(json.dumps(line) for line in lines))
+    output = tmp_path / "report.json"
+    with override_settings(SLOW_QUERY_LOG=str(log)):
+        call_command("slow_query_report", output=str(output))
+    report = json.loads(output.read_text())
+    assert len(report) == 1
+    assert report[0]["count"] == 2
+    assert report[0]["max_ms"] == 300
@@ -0,0 +1,65 @@
+import pytest
+from django.db import OperationalError
+
+from blog import views
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_stale_page_served_when_database_is_locked(
+        mixer, client, published_category, monkeypatch
+):
+    post = mixer.blend("blog.Post", category=published_category)
+    response = client.get("/")
+    assert response.status_code == 200
+    assert "X-Served-Stale" not in response
+
+    def locked(*args, **kwargs):
+        raise OperationalError("database is locked")
+
+    monkeypatch.setattr(views.Index, "get_queryset", locked)
+    stale_response = client.get("/")
+    assert stale_response.status_code == 200, (
+        "Убедитесь, что при блокировке базы главная страница отдаётся "
+        "из последней удачной отрисовки."
+    )
+    assert stale_response["X-Served-Stale"] == "1"
+    assert post.title in stale_response.content.decode()
+
+
+def test_error_raised_without_stale_page(client, monkeypatch):
+    def locked(*args, **kwargs):
+        raise OperationalError("database is locked")
+
+    monkeypatch.setattr(views.Index, "get_queryset", locked)
+    with pytest.raises(OperationalError):
+        client.get("/")
+
+
+def test_query_deadline_aborts_long_query():
+    from django.db import connection
+
+    from core.db import QueryDeadlineExceeded, query_deadline
+
+    with pytest.raises(QueryDeadlineExceeded):
+        with query_deadline(50):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL "
+                    "SELECT i + 1 FROM n) SELECT count(*) FROM n")
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+def test_deadline_exceeded_returns_503(client, monkeypatch):
+    from core.db import QueryDeadlineExceeded
+
+    def slow(*args, **kwargs):
+        raise QueryDeadlineExceeded("deadline")
+
+    monkeypatch.setattr(views.Index, "get_queryset", slow)
+    response = client.get("/")
+    assert response.status_code == 503, (
+        "Убедитесь, что при истечении срока на запросы к базе "
+        "возвращается ответ 503."
+    )